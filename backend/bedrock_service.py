@@ -1,14 +1,78 @@
-import boto3
 import json
+import hashlib
 import logging
-from typing import List
+import threading
+from contextlib import nullcontext
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence
+from pydantic import TypeAdapter
 from config import settings
 from models import CommentSuggestion, RedditPost
+from cache import CacheBackend, MemoryCache
+from recorder import build_bedrock_client
 
 logger = logging.getLogger(__name__)
 
+_suggestions_adapter = TypeAdapter(List[CommentSuggestion])
+
+# Tones in the order they are generated and returned, with how the prompt describes them
+TONES = ("Supportive", "Provoking", "Humorous")
+TONE_DESCRIPTIONS = {
+    "Supportive": "Supportive/Encouraging",
+    "Provoking": "Provoking/Very Strong Opninionated",
+    "Humorous": "Humorous/Dark",
+}
+# Output budget per requested tone (all three get the full 1500 tokens)
+MAX_TOKENS_PER_TONE = 500
+
+def post_fingerprint(post: RedditPost) -> str:
+    """Digest of a post's title and body; edits to either invalidate anything generated for it"""
+    return hashlib.sha1(f"{post.title}\0{post.content}".encode("utf-8")).hexdigest()[:16]
+
+def parse_tones(value: Optional[str]) -> Optional[List[str]]:
+    """Parse a comma-separated tone selection into canonical tone names, or None for all tones"""
+    if value is None:
+        return None
+    requested = {tone.strip().lower() for tone in value.split(",") if tone.strip()}
+    if not requested:
+        return None
+    unknown = requested - {tone.lower() for tone in TONES}
+    if unknown:
+        raise ValueError(f"Unknown tone(s) {', '.join(sorted(unknown))}, expected any of {', '.join(TONES)}")
+    return [tone for tone in TONES if tone.lower() in requested]
+
+class Generation(NamedTuple):
+    """Suggestions for a post, and which of them Bedrock produced during this call"""
+    suggestions: List[CommentSuggestion]
+    generated: List[CommentSuggestion]
+
 class BedrockService:
-    def __init__(self):
+    def __init__(
+        self,
+        cache: Optional[CacheBackend] = None,
+        client: Optional[Any] = None
+    ):
+        self.cache = cache if cache is not None else MemoryCache()
+        
+        # The boto3 client is built on first use so importing the app stays cheap
+        self._bedrock_client = client
+        self._client_lock = threading.Lock()
+    
+    @property
+    def is_initialized(self) -> bool:
+        return self._bedrock_client is not None
+    
+    @property
+    def bedrock_client(self):
+        """Bedrock runtime client, created lazily and at most once across threads"""
+        if self._bedrock_client is None:
+            with self._client_lock:
+                if self._bedrock_client is None:
+                    self._bedrock_client = build_bedrock_client(self._create_client)
+        return self._bedrock_client
+    
+    def _create_client(self):
+        import boto3
+        
         # Prepare credentials for Bedrock client
         client_kwargs = {
             'service_name': 'bedrock-runtime',
@@ -25,22 +89,102 @@ class BedrockService:
                 client_kwargs['aws_session_token'] = settings.AWS_SESSION_TOKEN
         
         try:
-            self.bedrock_client = boto3.client(**client_kwargs)
+            client = boto3.client(**client_kwargs)
             logger.info("Bedrock client initialized successfully")
+            return client
         except Exception as e:
             logger.error(f"Failed to initialize Bedrock client: {str(e)}")
             raise
     
-    def generate_comment_suggestions(self, post: RedditPost) -> List[CommentSuggestion]:
-        """Generate 3 comment suggestions for a Reddit post using Bedrock"""
+    @staticmethod
+    def _suggestions_key(post: RedditPost, tone: str) -> str:
+        return f"suggestions:{settings.BEDROCK_MODEL_ID}:{post.id}:{post_fingerprint(post)}:{tone.lower()}"
+    
+    def _cached_by_tone(self, post: RedditPost, tones: Sequence[str]) -> Dict[str, List[CommentSuggestion]]:
+        """Cached suggestions for whichever of the tones are still cached"""
+        found = {}
+        for tone in tones:
+            entry = self.cache.get(self._suggestions_key(post, tone))
+            if entry is not None:
+                found[tone] = _suggestions_adapter.validate_json(entry.value)
+        return found
+    
+    def suggestions_fingerprint(self, post: RedditPost, tones: Optional[Sequence[str]] = None) -> Optional[bytes]:
+        """Cached suggestion bytes for every requested tone, or None if any must still be generated"""
+        parts = []
+        for tone in tones or TONES:
+            entry = self.cache.get(self._suggestions_key(post, tone))
+            if entry is None:
+                return None
+            parts.append(entry.value)
+        return b"\0".join(parts)
+    
+    def get_cached_suggestions(
+        self, post: RedditPost, tones: Optional[Sequence[str]] = None
+    ) -> Optional[List[CommentSuggestion]]:
+        """Return previously generated suggestions for a post, if every requested tone is still cached"""
+        tones = tones or TONES
+        found = self._cached_by_tone(post, tones)
+        if len(found) < len(tones):
+            return None
+        return [suggestion for tone in tones for suggestion in found[tone]]
+    
+    def generate_comment_suggestions(
+        self, post: RedditPost, tones: Optional[Sequence[str]] = None, refresh: bool = False
+    ) -> List[CommentSuggestion]:
+        """Generate one comment suggestion per requested tone (default: all 3) using Bedrock.
+        
+        With refresh=True the requested tones are regenerated even if cached.
+        """
+        return self.generate(post, tones, refresh).suggestions
+    
+    def generate(
+        self, post: RedditPost, tones: Optional[Sequence[str]] = None, refresh: bool = False
+    ) -> Generation:
+        """Like generate_comment_suggestions, also reporting which suggestions are new model output"""
+        tones = list(tones or TONES)
+        found = {} if refresh else self._cached_by_tone(post, tones)
+        missing = [tone for tone in tones if tone not in found]
+        generated = {}
+        
+        if missing:
+            # Single-flight: concurrent requests for the same post and tones share one Bedrock call
+            # With caching disabled a waiter would find nothing and generate anyway, so skip the lock.
+            lock_name = self._suggestions_key(post, "+".join(missing))
+            if settings.SUGGESTION_CACHE_TTL > 0:
+                lock = self.cache.lock(lock_name, ttl=120.0, wait=120.0)
+            else:
+                lock = nullcontext()
+            with lock:
+                if not refresh:
+                    found.update(self._cached_by_tone(post, missing))
+                    missing = [tone for tone in tones if tone not in found]
+                if missing:
+                    generated = self._generate_uncached(post, missing)
+                    # A tone the model skipped (or a failed call) falls back rather than failing the post
+                    found.update({**self._fallback_by_tone(missing), **generated})
+        else:
+            logger.debug(f"Suggestion cache hit for post {post.id}")
+        
+        # Tones cached from earlier generations are merged with the newly generated ones
+        return Generation(
+            suggestions=[suggestion for tone in tones for suggestion in found[tone]],
+            generated=[suggestion for tone in tones for suggestion in generated.get(tone, [])]
+        )
+    
+    def _generate_uncached(self, post: RedditPost, tones: Sequence[str] = TONES) -> Dict[str, List[CommentSuggestion]]:
+        """Call Bedrock for the given tones of a post, caching and returning the model's output per tone.
+        
+        Tones the model skipped are absent, and the result is empty if the call or parsing failed.
+        """
         try:
             # Create a comprehensive prompt for comment generation
-            prompt = self._create_comment_prompt(post)
+            prompt = self._create_comment_prompt(post, tones)
             
             # Prepare the request body for Claude
             request_body = {
                 "anthropic_version": "bedrock-2023-05-31",
-                "max_tokens": 1500,  # Increased to prevent truncation
+                "max_tokens": MAX_TOKENS_PER_TONE * len(tones),  # Sized to prevent truncation
                 "temperature": 0.7,
                 "messages": [
                     {
@@ -65,10 +209,24 @@ class BedrockService:
             logger.debug(f"Bedrock response for post {post.id}: {response_text[:300]}...")
             
             # Parse the structured response into CommentSuggestion objects
-            suggestions = self._parse_comment_response(response_text)
+            suggestions = self._try_parse_comment_response(response_text, tones)
+            if suggestions is None:
+                return {}
+            
+            by_tone = {}
+            for suggestion in suggestions:
+                by_tone.setdefault(suggestion.tone, []).append(suggestion)
+            
+            # Only real model output is cached; fallbacks are retried next time
+            for tone, tone_suggestions in by_tone.items():
+                self.cache.set(
+                    self._suggestions_key(post, tone),
+                    _suggestions_adapter.dump_json(tone_suggestions),
+                    settings.SUGGESTION_CACHE_TTL
+                )
             
             logger.info(f"Generated {len(suggestions)} comment suggestions for post {post.id}")
-            return suggestions
+            return by_tone
             
         except Exception as e:
             error_msg = str(e)
@@ -82,14 +240,31 @@ class BedrockService:
             elif "ModelNotFoundError" in error_msg:
                 logger.error(f"Model {settings.BEDROCK_MODEL_ID} not found or not accessible.")
             
-            # Return fallback suggestions
-            return self._get_fallback_suggestions()
+            # The caller substitutes fallback suggestions
+            return {}
     
-    def _create_comment_prompt(self, post: RedditPost) -> str:
-        """Create a detailed prompt for comment generation"""
+    def _create_comment_prompt(self, post: RedditPost, tones: Sequence[str] = TONES) -> str:
+        """Create a detailed prompt for comment generation, asking only for the given tones"""
+        count = len(tones)
+        if count > 1:
+            request = f"exactly {count} different comment suggestions"
+            intro = f"Please generate {count} diverse comment suggestions with different tones:"
+        else:
+            request = "exactly 1 comment suggestion"
+            intro = "Please generate 1 comment suggestion with this tone:"
+        tone_list = "\n".join(f"{i}. {TONE_DESCRIPTIONS[tone]}" for i, tone in enumerate(tones, 1))
+        examples = ",\n".join(
+            f"""        {{
+            "comment": "Your {tone.lower()} comment here",
+            "tone": "{tone}",
+            "reasoning": "Why this comment works"
+        }}"""
+            for tone in tones
+        )
+        
         return f"""
 You are a helpful Reddit user who wants to engage meaningfully with posts. 
-Analyze the following Reddit post and generate exactly 3 different comment suggestions.
+Analyze the following Reddit post and generate {request}.
 
 POST DETAILS:
 Title: {post.title}
@@ -99,10 +274,8 @@ Author: {post.author}
 Score: {post.score}
 Comments: {post.num_comments}
 
-Please generate 3 diverse comment suggestions with different tones:
-1. Supportive/Encouraging
-2. Provoking/Very Strong Opninionated
-3. Humorous/Dark
+{intro}
+{tone_list}
 
 For each suggestion, provide:
 - The actual comment text (keep it concise, 1-3 sentences)
@@ -112,21 +285,7 @@ For each suggestion, provide:
 Format your response as JSON:
 {{
     "suggestions": [
-        {{
-            "comment": "Your supportive comment here",
-            "tone": "Supportive",
-            "reasoning": "Why this comment works"
-        }},
-        {{
-            "comment": "Your provoking comment here", 
-            "tone": "provoking",
-            "reasoning": "Why this comment works"
-        }},
-        {{
-            "comment": "Your humorous comment here",
-            "tone": "Humorous", 
-            "reasoning": "Why this comment works"
-        }}
+{examples}
     ]
 }}
 
@@ -138,8 +297,17 @@ Make sure comments are:
 - human-like and texting style 
 """
     
-    def _parse_comment_response(self, response_text: str) -> List[CommentSuggestion]:
+    def _parse_comment_response(self, response_text: str, tones: Sequence[str] = TONES) -> List[CommentSuggestion]:
         """Parse the AI response into CommentSuggestion objects"""
+        suggestions = self._try_parse_comment_response(response_text, tones)
+        if suggestions is None:
+            return [s for tone_suggestions in self._fallback_by_tone(tones).values() for s in tone_suggestions]
+        return suggestions
+    
+    def _try_parse_comment_response(
+        self, response_text: str, tones: Sequence[str] = TONES
+    ) -> Optional[List[CommentSuggestion]]:
+        """Parse the AI response for the requested tones, returning None when it cannot be parsed"""
         try:
             # Log the raw response for debugging (truncated for logs)
             logger.debug(f"Raw AI response length: {len(response_text)} chars")
@@ -191,16 +359,21 @@ Make sure comments are:
                 logger.error("No valid suggestions found in response")
                 raise ValueError("No valid suggestions found")
             
+            suggestions = self._assign_tones(suggestions, tones)
+            if not suggestions:
+                logger.error(f"No suggestions matched the requested tones: {', '.join(tones)}")
+                raise ValueError("No suggestions for the requested tones")
+            
             logger.info(f"Successfully parsed {len(suggestions)} suggestions")
-            return suggestions[:3]  # Ensure we only return 3 suggestions
+            return suggestions
             
         except json.JSONDecodeError as e:
             logger.error(f"JSON decode error: {str(e)}. Raw response: {response_text[:200]}...")
-            return self._get_fallback_suggestions()
+            return None
         except Exception as e:
             logger.error(f"Error parsing comment response: {str(e)}")
             logger.error(f"Response text: {response_text[:500]}...")
-            return self._get_fallback_suggestions()
+            return None
     
     def _fix_json_issues(self, json_text: str) -> str:
         """Try to fix common JSON formatting issues"""
@@ -233,6 +406,30 @@ Make sure comments are:
             logger.warning(f"Failed to fix JSON issues: {e}")
             return json_text
     
+    @staticmethod
+    def _assign_tones(suggestions: List[CommentSuggestion], tones: Sequence[str]) -> List[CommentSuggestion]:
+        """Label suggestions with canonical tone names, one per requested tone, in request order"""
+        by_tone: Dict[str, CommentSuggestion] = {}
+        unmatched = []
+        for suggestion in suggestions:
+            label = suggestion.tone.lower()
+            tone = next((t for t in TONES if label.startswith(t.lower())), None)
+            if tone is None:
+                unmatched.append(suggestion)
+            elif tone in tones and tone not in by_tone:
+                by_tone[tone] = suggestion.model_copy(update={"tone": tone})
+        
+        # Labels the model made up take the remaining requested tones in order
+        for tone in tones:
+            if tone not in by_tone and unmatched:
+                by_tone[tone] = unmatched.pop(0).model_copy(update={"tone": tone})
+        return [by_tone[tone] for tone in tones if tone in by_tone]
+    
+    def _fallback_by_tone(self, tones: Sequence[str]) -> Dict[str, List[CommentSuggestion]]:
+        """Fallback suggestions for the requested tones (the provoking slot is a milder analytical one)"""
+        fallbacks = self._get_fallback_suggestions()
+        return {tone: [fallbacks[TONES.index(tone)]] for tone in tones}
+    
     def _get_fallback_suggestions(self) -> List[CommentSuggestion]:
         """Return fallback suggestions when AI generation fails"""
         return [
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Import Time Benchmark
+Measures how long a fresh interpreter takes to import the FastAPI app,
+which bounds cold start and every --reload cycle
+"""
+
+import sys
+import os
+import time
+import argparse
+import statistics
+import subprocess
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that should only be imported once a client is first used
+HEAVY_MODULES = ["boto3", "botocore", "praw", "prawcore"]
+
+def time_import(module: str) -> float:
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", f"import {module}"], cwd=BACKEND_DIR, check=True)
+    return time.perf_counter() - start
+
+def slowest_imports(module: str, top: int):
+    """Return the modules with the largest cumulative import time (microseconds)"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative), name.strip()))
+    rows.sort(reverse=True)
+    return rows[:top]
+
+def loaded_heavy_modules(module: str):
+    code = f"import sys, {module}; print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    )
+    return [m for m in result.stdout.strip().split(",") if m]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--module", default="main", help="Module to import")
+    parser.add_argument("--runs", type=int, default=10, help="Fresh interpreters to time")
+    parser.add_argument("--top", type=int, default=10, help="Slowest imports to list")
+    args = parser.parse_args()
+
+    baseline = [time_import("sys") for _ in range(args.runs)]
+    timings = [time_import(args.module) for _ in range(args.runs)]
+    interpreter = statistics.median(baseline)
+
+    print(f"⏱️  Import time for '{args.module}' ({args.runs} runs)")
+    print(f"   interpreter startup: {interpreter * 1000:.1f} ms")
+    print(f"   median import:       {(statistics.median(timings) - interpreter) * 1000:.1f} ms")
+    print(f"   max import:          {(max(timings) - interpreter) * 1000:.1f} ms")
+
+    heavy = loaded_heavy_modules(args.module)
+    if heavy:
+        print(f"⚠️  Heavy modules imported eagerly: {', '.join(heavy)}")
+    else:
+        print("✅ No heavy client modules imported at import time")
+
+    print("\nSlowest imports (cumulative):")
+    for cumulative, name in slowest_imports(args.module, args.top):
+        print(f"   {cumulative / 1000:>8.1f} ms  {name}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Parser and Model Construction Micro-benchmark
+Reports ns/op, peak traced memory and retained blocks per op for response
+parsing, JSON repair, listing conversion and RedditPost construction over
+synthetic payloads and, optionally, real ones from a recorded cassette
+"""
+
+import sys
+import os
+import json
+import time
+import logging
+import argparse
+import tracemalloc
+from datetime import datetime
+from types import SimpleNamespace
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fakes import FakeReddit
+from models import RedditPost
+from bedrock_service import BedrockService
+from reddit_service import RedditService
+
+TONES = ("Supportive", "Provoking", "Humorous")
+
+def suggestion_json(count: int = 3, comment_words: int = 25, indent=4) -> str:
+    suggestions = [
+        {
+            "comment": " ".join(["word"] * comment_words) + f" ({i})",
+            "tone": TONES[i % 3],
+            "reasoning": "Engages with the post directly so readers are likely to upvote it",
+        }
+        for i in range(count)
+    ]
+    return json.dumps({"suggestions": suggestions}, indent=indent)
+
+def synthetic_responses():
+    """Model outputs covering the shapes seen in production"""
+    clean = suggestion_json()
+    return {
+        "clean": clean,
+        "prose-wrapped": f"Here are three suggestions for this post:\n\n{clean}\n\nLet me know if you want more!",
+        "fenced": f"```json\n{clean}\n```",
+        "truncated": clean[: int(len(clean) * 0.8)],
+        "multi-object": f"{clean}\n\nAlternative set:\n{suggestion_json(indent=None)}",
+        "no-json": "I'm sorry, but I can't help with generating comments for this post.",
+        "huge": suggestion_json(count=60, comment_words=120),
+    }
+
+def cassette_responses(path: str):
+    """Model outputs recorded by UPSTREAM_MODE=record"""
+    from recorder import Cassette
+
+    responses = {}
+    for i, entry in enumerate(Cassette(path).entries("bedrock")):
+        if "data" in entry:
+            text = json.loads(entry["data"])["content"][0]["text"]
+            responses[f"recorded-{i}"] = text
+    return responses
+
+def cassette_listings(path: str):
+    """Hot listings recorded by UPSTREAM_MODE=record, as the submission objects replay serves"""
+    from recorder import Cassette, _dict_to_submission
+
+    listings = {}
+    for i, entry in enumerate(Cassette(path).entries("reddit")):
+        if entry.get("data"):
+            subreddit = entry["key"].split(":", 1)[0]
+            listings[f"recorded-{subreddit}-{i}"] = [_dict_to_submission(s) for s in entry["data"]]
+    return listings
+
+def submission_payloads(count: int):
+    reddit = FakeReddit(latency="const:0")
+    return list(reddit.subreddit("benchmark").hot(limit=count))
+
+class StaticReddit:
+    """Serves prebuilt submissions, so listing cases time conversion rather than payload generation"""
+
+    def __init__(self, listings):
+        self.listings = listings
+
+    def subreddit(self, name: str):
+        return SimpleNamespace(display_name=name, hot=lambda limit=10: iter(self.listings[name][:limit]))
+
+def calibrate(fn, target: float) -> int:
+    """Pick an iteration count that takes roughly `target` seconds"""
+    iterations = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(iterations):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= target / 10 or iterations >= 1_000_000:
+            return max(1, int(iterations * target / max(elapsed, 1e-9)))
+        iterations *= 10
+
+def measure(fn, target: float):
+    iterations = calibrate(fn, target)
+    start = time.perf_counter_ns()
+    for _ in range(iterations):
+        fn()
+    ns_per_op = (time.perf_counter_ns() - start) / iterations
+
+    # Peak bytes traced while a single op runs, and blocks it leaves allocated
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    base, _ = tracemalloc.get_traced_memory()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    snapshot = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    blocks = sum(stat.count for stat in snapshot.statistics("filename"))
+    return ns_per_op, peak - base, blocks, iterations
+
+def report(name: str, fn, target: float):
+    ns_per_op, peak_bytes, blocks, iterations = measure(fn, target)
+    print(f"{name:<40} {ns_per_op:>12,.0f} {peak_bytes / 1024:>10.1f} {blocks:>8} {iterations:>9}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--cassette", help="Add recorded Bedrock responses and Reddit listings to the corpus")
+    parser.add_argument("--target", type=float, default=0.3, help="Seconds to spend per case")
+    parser.add_argument("--filter", default="", help="Only run cases whose name contains this")
+    parser.add_argument("--debug-logging", action="store_true",
+                        help="Enable DEBUG on the service loggers (output is discarded)")
+    args = parser.parse_args()
+
+    if args.debug_logging:
+        for name in ("bedrock_service", "reddit_service"):
+            service_logger = logging.getLogger(name)
+            service_logger.setLevel(logging.DEBUG)
+            service_logger.addHandler(logging.NullHandler())
+            service_logger.propagate = False
+    else:
+        logging.disable(logging.CRITICAL)
+
+    bedrock = BedrockService(client=object())
+
+    responses = synthetic_responses()
+    listings = {"synthetic": submission_payloads(25)}
+    if args.cassette:
+        responses.update(cassette_responses(args.cassette))
+        listings.update(cassette_listings(args.cassette))
+    reddit = RedditService(reddit=StaticReddit(listings))
+
+    cases = []
+    for name, text in responses.items():
+        cases.append((f"parse/{name} ({len(text)}B)", lambda t=text: bedrock._parse_comment_response(t)))
+    for name, text in responses.items():
+        start, end = text.find("{"), text.rfind("}") + 1
+        if start != -1 and end:
+            cases.append((f"fix_json/{name}", lambda t=text[start:end]: bedrock._fix_json_issues(t)))
+
+    post_fields = {"synthetic": dict(
+        id="abc123", title="A typical title", content="Body " * 200, author="someone",
+        subreddit="benchmark", score=1234, num_comments=56, created_utc=datetime(2024, 1, 1),
+        url="https://example.com", permalink="https://reddit.com/r/benchmark/comments/abc123",
+        thumbnail=None
+    )}
+    for name, submissions in listings.items():
+        count = len(submissions)
+        cases.append((f"listing/{name} x{count}", lambda n=name, c=count: reddit._fetch_hot_posts_uncached(n, c)))
+        if name != "synthetic":
+            posts = reddit._fetch_hot_posts_uncached(name, count)
+            if posts:
+                # The longest body is the most expensive post to validate
+                post_fields[name] = max(posts, key=lambda post: len(post.content)).model_dump()
+    for name, fields in post_fields.items():
+        cases.append((f"model/{name} validated", lambda f=fields: RedditPost(**f)))
+        cases.append((f"model/{name} model_construct", lambda f=fields: RedditPost.model_construct(**f)))
+
+    print(f"{'case':<40} {'ns/op':>12} {'peak KiB':>10} {'retained':>8} {'iters':>9}")
+    for name, fn in cases:
+        if args.filter in name:
+            report(name, fn, args.target)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Response Serialization Benchmark
+Compares FastAPI's default response_model path against FastJSONResponse
+for 25-post and 50-post PostWithComments payloads
+"""
+
+import sys
+import os
+import time
+import argparse
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datetime import datetime
+from typing import List
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from models import RedditPost, CommentSuggestion, PostWithComments
+from responses import FastJSONResponse
+
+PAYLOAD_SIZES = [25, 50]
+
+def build_payload(count: int) -> List[PostWithComments]:
+    """Build a realistic multi response: 1000-char content and 3 suggestions per post"""
+    payload = []
+    for i in range(count):
+        post = RedditPost.model_construct(
+            id=f"post{i}",
+            title=f"Benchmark post number {i} with a reasonably long title for realism",
+            content=("Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 20)[:1000],
+            author=f"user{i}",
+            subreddit="benchmark",
+            score=1000 - i,
+            num_comments=50 + i,
+            created_utc=datetime(2024, 1, 1, 12, 0, 0),
+            url=f"https://example.com/{i}",
+            permalink=f"https://reddit.com/r/benchmark/comments/post{i}",
+            thumbnail=None
+        )
+        suggestions = [
+            CommentSuggestion.model_construct(
+                comment=f"A {tone.lower()} comment about post {i}, kept to a sentence or two.",
+                tone=tone,
+                reasoning="Engages with the post content in a way readers are likely to upvote"
+            )
+            for tone in ("Supportive", "Provoking", "Humorous")
+        ]
+        payload.append(PostWithComments.model_construct(post=post, comment_suggestions=suggestions))
+    return payload
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+    payloads = {size: build_payload(size) for size in PAYLOAD_SIZES}
+
+    @app.get("/default/{size}", response_model=List[PostWithComments])
+    async def default_path(size: int):
+        return payloads[size]
+
+    @app.get("/fast/{size}", response_model=List[PostWithComments])
+    async def fast_path(size: int):
+        return FastJSONResponse(payloads[size])
+
+    return app
+
+def run(client: TestClient, path: str, requests: int):
+    # Warm up so route compilation and first-call costs are excluded
+    for _ in range(20):
+        client.get(path)
+
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    for _ in range(requests):
+        response = client.get(path)
+        assert response.status_code == 200
+    cpu = time.process_time() - cpu_start
+    wall = time.perf_counter() - wall_start
+    return requests / wall, cpu / requests * 1000, len(response.content)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=500, help="Requests per scenario")
+    args = parser.parse_args()
+
+    client = TestClient(build_app())
+    print(f"📊 Serialization benchmark ({args.requests} requests per scenario)")
+    print(f"{'payload':>8} {'path':>8} {'req/s':>10} {'cpu ms/req':>11} {'bytes':>9}")
+    for size in PAYLOAD_SIZES:
+        results = {}
+        for name in ("default", "fast"):
+            rps, cpu_ms, body_size = run(client, f"/{name}/{size}", args.requests)
+            results[name] = cpu_ms
+            print(f"{size:>8} {name:>8} {rps:>10.1f} {cpu_ms:>11.3f} {body_size:>9}")
+        print(f"{'':>8} {'speedup':>8} {results['default'] / results['fast']:>10.2f}x cpu")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""
+Offline stand-ins for the PRAW client and the bedrock-runtime client.
+
+They are injected into RedditService/BedrockService so the real request
+path runs end to end (executor, caches, parsing, serialization) without
+network access or credentials.
+"""
+
+import json
+import math
+import time
+import random
+import threading
+from types import SimpleNamespace
+from typing import Iterator, Optional
+
+from recorder import ResponseBody
+
+
+class LatencyModel:
+    """Latency distribution parsed from a spec string (all values in ms).
+
+    ``const:50``          always 50 ms
+    ``uniform:20:80``     uniform between 20 and 80 ms
+    ``normal:100:20``     normal with mean 100 ms and stddev 20 ms
+    ``lognormal:800:0.5`` lognormal with median 800 ms and sigma 0.5
+    ``exp:200``           exponential with mean 200 ms
+    """
+
+    def __init__(self, spec: str, rng: Optional[random.Random] = None):
+        self.spec = spec
+        kind, *params = spec.split(":")
+        self.kind = kind
+        self.params = [float(p) for p in params]
+        self.rng = rng or random.Random()
+        self._lock = threading.Lock()
+
+        expected = {"const": 1, "uniform": 2, "normal": 2, "lognormal": 2, "exp": 1}
+        if kind not in expected or len(self.params) != expected[kind]:
+            raise ValueError(f"Invalid latency spec: {spec}")
+
+    def sample(self) -> float:
+        """Return a latency in seconds"""
+        with self._lock:
+            if self.kind == "const":
+                ms = self.params[0]
+            elif self.kind == "uniform":
+                ms = self.rng.uniform(*self.params)
+            elif self.kind == "normal":
+                ms = self.rng.gauss(*self.params)
+            elif self.kind == "lognormal":
+                ms = self.rng.lognormvariate(math.log(self.params[0]), self.params[1])
+            else:
+                ms = self.rng.expovariate(1.0 / self.params[0])
+        return max(0.0, ms) / 1000.0
+
+
+WORDS = (
+    "python release compiler thread memory browser rust kernel update server cloud database "
+    "garden recipe winter travel camera guitar museum budget football election climate rocket "
+    "library startup keyboard painting coffee bicycle ocean mountain history science privacy"
+).split()
+
+
+def _fake_text(seed: str, words: int) -> str:
+    """Deterministic filler so distinct posts do not look like near-duplicates"""
+    rng = random.Random(seed)
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+class FakeRedditError(Exception):
+    pass
+
+
+class FakeThrottlingException(Exception):
+    """Mimics the message of botocore's ClientError for a throttled call"""
+
+    def __init__(self):
+        super().__init__(
+            "An error occurred (ThrottlingException) when calling the InvokeModel operation: Rate exceeded"
+        )
+
+
+class FakeSubreddit:
+    def __init__(self, reddit: "FakeReddit", name: str):
+        self.reddit = reddit
+        self.display_name = name
+
+    def hot(self, limit: int = 10) -> Iterator[SimpleNamespace]:
+        # One listing request per call, like PRAW's first page fetch
+        self.reddit.calls += 1
+        time.sleep(self.reddit.latency.sample())
+        if self.reddit.rng.random() < self.reddit.error_rate:
+            raise FakeRedditError(f"received 503 HTTP response for r/{self.display_name}")
+
+        now = time.time()
+        for i in range(limit):
+            post_id = f"{self.display_name[:4]}{i:04d}"
+            # Crossposts share their title and link with the same slot in other subreddits
+            crosspost = self.reddit.rng.random() < self.reddit.crosspost_rate
+            content_id = f"shared{i:04d}" if crosspost else post_id
+            yield SimpleNamespace(
+                id=post_id,
+                title=_fake_text(f"{content_id}:title", 12).capitalize(),
+                selftext="" if crosspost or i % 2 else _fake_text(f"{post_id}:body", 150),
+                url=f"https://example.com/links/{content_id}",
+                author=f"author_{i}",
+                subreddit=self,
+                score=5000 // (i + 1),
+                num_comments=400 // (i + 1),
+                created_utc=now - 3600 * (i + 1),
+                permalink=f"/r/{self.display_name}/comments/{post_id}/",
+                thumbnail="self",
+                stickied=False,
+            )
+
+
+class FakeReddit:
+    """Stand-in for praw.Reddit serving synthetic hot listings"""
+
+    def __init__(
+        self,
+        latency: str = "uniform:80:200",
+        error_rate: float = 0.0,
+        crosspost_rate: float = 0.0,
+        seed: Optional[int] = None
+    ):
+        self.rng = random.Random(seed)
+        self.latency = LatencyModel(latency, random.Random(seed))
+        self.error_rate = error_rate
+        self.crosspost_rate = crosspost_rate
+        self.calls = 0
+
+    def subreddit(self, name: str) -> FakeSubreddit:
+        return FakeSubreddit(self, name)
+
+
+class FakeBedrockClient:
+    """Stand-in for the bedrock-runtime client returning well-formed suggestions.
+
+    ``max_concurrency`` models a provisioned-throughput limit: calls beyond it
+    are throttled, on top of the random ``throttle_rate``.
+    """
+
+    def __init__(
+        self,
+        latency: str = "lognormal:1500:0.4",
+        error_rate: float = 0.0,
+        throttle_rate: float = 0.0,
+        max_concurrency: Optional[int] = None,
+        seed: Optional[int] = None
+    ):
+        self.rng = random.Random(seed)
+        self.latency = LatencyModel(latency, random.Random(seed))
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.max_concurrency = max_concurrency
+        self.calls = 0
+        self.throttled = 0
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+    def invoke_model(self, modelId: str, body: str, contentType: str = "application/json", **kwargs):
+        with self._lock:
+            self.calls += 1
+            over_limit = self.max_concurrency is not None and self._in_flight >= self.max_concurrency
+            throttled = over_limit or self.rng.random() < self.throttle_rate
+            failed = not throttled and self.rng.random() < self.error_rate
+            if throttled:
+                self.throttled += 1
+            else:
+                self._in_flight += 1
+
+        if throttled:
+            raise FakeThrottlingException()
+
+        try:
+            time.sleep(self.latency.sample())
+            if failed:
+                raise Exception("An error occurred (ModelErrorException) when calling the InvokeModel operation")
+            return {"body": ResponseBody(self._response_body(json.loads(body)))}
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+    def _response_body(self, request: dict) -> bytes:
+        # Answer only the tones the prompt's JSON example asks for
+        prompt = request["messages"][0]["content"]
+        tones = [tone for tone in ("Supportive", "Provoking", "Humorous") if f'"tone": "{tone}"' in prompt]
+        suggestions = [
+            {
+                "comment": f"A {tone.lower()} take on this post, written the way people actually text.",
+                "tone": tone,
+                "reasoning": "Speaks directly to the post so it is likely to get upvotes",
+            }
+            for tone in tones
+        ]
+        text = json.dumps({"suggestions": suggestions}, indent=2)
+        return json.dumps({"content": [{"type": "text", "text": text}]}).encode("utf-8")
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Offline Load Test
+Runs the API in-process against fake Reddit and Bedrock clients and drives
+each endpoint at increasing concurrency, reporting throughput and latency
+percentiles. No credentials or network access are needed.
+"""
+
+import sys
+import os
+import json
+import time
+import socket
+import asyncio
+import argparse
+import threading
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Configure the app before it is imported
+os.environ.setdefault("REDDIT_CLIENT_ID", "loadtest")
+os.environ.setdefault("REDDIT_CLIENT_SECRET", "loadtest")
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "loadtest")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "loadtest")
+os.environ["CACHE_BACKEND"] = "memory"
+# Keep fake posts out of the history database (and its writer out of the measurements)
+os.environ["STORE_ENABLED"] = "false"
+os.environ["WARMUP_ON_STARTUP"] = "false"
+
+import httpx
+import uvicorn
+import logging
+
+from fakes import FakeReddit, FakeBedrockClient, _fake_text
+
+SUBREDDITS = ["python", "programming", "askreddit", "technology", "science", "worldnews"]
+ENDPOINTS = ["posts-only", "posts", "multi", "generate"]
+
+def sample_posts(count: int = 3):
+    # Distinct text and links so deduplication keeps one generation per post,
+    # matching the Bedrock call count of runs recorded before it existed
+    return [
+        {
+            "id": f"gen{i}",
+            "title": _fake_text(f"gen{i}:title", 12).capitalize(),
+            "content": _fake_text(f"gen{i}:body", 100),
+            "author": "loadtest",
+            "subreddit": "python",
+            "score": 100,
+            "num_comments": 10,
+            "created_utc": "2024-01-01T12:00:00",
+            "url": f"https://example.com/links/gen{i}",
+            "permalink": f"https://reddit.com/r/python/comments/gen{i}",
+        }
+        for i in range(count)
+    ]
+
+def build_request(endpoint: str, n: int):
+    """Return (method, path, json body) for the n-th request to an endpoint"""
+    subreddit = SUBREDDITS[n % len(SUBREDDITS)]
+    if endpoint == "posts-only":
+        return "GET", f"/posts/{subreddit}/posts-only?limit=10", None
+    if endpoint == "posts":
+        return "GET", f"/posts/{subreddit}?limit=3", None
+    if endpoint == "multi":
+        subreddits = ",".join(SUBREDDITS[:3])
+        return "GET", f"/posts/multi?subreddits={subreddits}&posts_per_subreddit=3", None
+    if endpoint == "generate":
+        return "POST", "/posts/generate-comments", sample_posts()
+    raise ValueError(f"Unknown endpoint: {endpoint}")
+
+def percentile(sorted_values, pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def start_server(args):
+    """Import the app, inject the fakes and serve it from a background thread"""
+    import main
+    from config import settings
+    from reddit_service import RedditService
+    from bedrock_service import BedrockService
+
+    if not args.with_cache:
+        settings.LISTING_CACHE_TTL = 0
+        settings.SUGGESTION_CACHE_TTL = 0
+
+    reddit = FakeReddit(
+        args.reddit_latency, args.reddit_error_rate, crosspost_rate=args.reddit_crosspost_rate, seed=args.seed
+    )
+    bedrock = FakeBedrockClient(
+        args.bedrock_latency,
+        error_rate=args.bedrock_error_rate,
+        throttle_rate=args.bedrock_throttle_rate,
+        max_concurrency=args.bedrock_max_concurrency,
+        seed=args.seed
+    )
+    if args.cassette:
+        # Recorded production traffic replaces the synthetic fakes
+        import recorder
+        settings.CASSETTE_PATH = args.cassette
+        settings.REPLAY_SPEED = args.replay_speed
+        main.reddit_service = RedditService(cache=main.cache, reddit=recorder.ReplayReddit(recorder.get_cassette()))
+        main.bedrock_service = BedrockService(cache=main.cache, client=recorder.ReplayBedrockClient(recorder.get_cassette()))
+    else:
+        main.reddit_service = RedditService(cache=main.cache, reddit=reddit)
+        main.bedrock_service = BedrockService(cache=main.cache, client=bedrock)
+    main.speculator.bedrock_service = main.bedrock_service
+
+    port = free_port()
+    config = uvicorn.Config(main.app, host="127.0.0.1", port=port, log_level="warning")
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, f"http://127.0.0.1:{port}", reddit, bedrock
+
+async def run_level(base_url: str, endpoint: str, concurrency: int, duration: float):
+    latencies = []
+    statuses = {}
+    counter = {"n": 0}
+    deadline = time.perf_counter() + duration
+
+    async def worker(client: httpx.AsyncClient):
+        while time.perf_counter() < deadline:
+            counter["n"] += 1
+            method, path, body = build_request(endpoint, counter["n"])
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, path, json=body)
+                status = response.status_code
+            except httpx.HTTPError:
+                status = "error"
+            latencies.append(time.perf_counter() - start)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=120, limits=limits) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    ok = statuses.get(200, 0)
+    return {
+        "endpoint": endpoint,
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "throughput": ok / elapsed,
+        "error_rate": 1 - ok / len(latencies) if latencies else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p90_ms": percentile(latencies, 90) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "max_ms": (latencies[-1] if latencies else 0.0) * 1000,
+        "statuses": {str(k): v for k, v in statuses.items()},
+    }
+
+def table_header(with_delta: bool = False) -> str:
+    header = f"{'endpoint':<11} {'conc':>5} {'reqs':>6} {'ok/s':>8} {'err%':>6} {'p50':>9} {'p90':>9} {'p99':>9} {'max':>9}"
+    if with_delta:
+        header += f" {'Δok/s':>8} {'Δp99':>9}"
+    return header
+
+def table_row(r, before=None) -> str:
+    line = (
+        f"{r['endpoint']:<11} {r['concurrency']:>5} {r['requests']:>6} {r['throughput']:>8.1f} "
+        f"{r['error_rate'] * 100:>5.1f}% {r['p50_ms']:>7.0f}ms {r['p90_ms']:>7.0f}ms "
+        f"{r['p99_ms']:>7.0f}ms {r['max_ms']:>7.0f}ms"
+    )
+    if before:
+        line += f" {r['throughput'] - before['throughput']:>+8.1f} {r['p99_ms'] - before['p99_ms']:>+7.0f}ms"
+    return line
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--endpoints", default=",".join(ENDPOINTS), help=f"Comma-separated subset of {ENDPOINTS}")
+    parser.add_argument("--concurrency", default="1,4,16,64", help="Comma-separated concurrency levels")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per concurrency level")
+    parser.add_argument("--reddit-latency", default="uniform:80:200", help="Reddit listing latency spec (ms)")
+    parser.add_argument("--reddit-error-rate", type=float, default=0.0)
+    parser.add_argument("--reddit-crosspost-rate", type=float, default=0.0,
+                        help="Fraction of posts crossposted to every requested subreddit")
+    parser.add_argument("--bedrock-latency", default="lognormal:1500:0.4", help="Bedrock latency spec (ms)")
+    parser.add_argument("--bedrock-error-rate", type=float, default=0.0)
+    parser.add_argument("--bedrock-throttle-rate", type=float, default=0.0)
+    parser.add_argument("--bedrock-max-concurrency", type=int, default=None,
+                        help="Throttle Bedrock calls beyond this many in flight")
+    parser.add_argument("--subreddits", default=",".join(SUBREDDITS), help="Subreddits to request")
+    parser.add_argument("--cassette", help="Replay a recorded cassette instead of the fakes")
+    parser.add_argument("--replay-speed", type=float, default=1.0, help="Cassette timing multiplier (0 = instant)")
+    parser.add_argument("--with-cache", action="store_true", help="Keep listing and suggestion caches enabled")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write results as JSON for later comparison")
+    parser.add_argument("--compare", help="JSON results from a previous run to diff against")
+    args = parser.parse_args()
+
+    # Keep per-request application logging out of the measurements
+    logging.disable(logging.ERROR)
+
+    SUBREDDITS[:] = [s.strip() for s in args.subreddits.split(",") if s.strip()]
+    endpoints = [e.strip() for e in args.endpoints.split(",") if e.strip()]
+    levels = [int(c) for c in args.concurrency.split(",")]
+
+    server, base_url, reddit, bedrock = start_server(args)
+    print(f"🚀 Load testing {base_url} ({args.duration:.0f}s per level)")
+    if args.cassette:
+        print(f"   replaying {args.cassette} at speed {args.replay_speed}")
+    else:
+        print(f"   reddit latency={args.reddit_latency} errors={args.reddit_error_rate:.0%}")
+        print(f"   bedrock latency={args.bedrock_latency} errors={args.bedrock_error_rate:.0%} "
+              f"throttle={args.bedrock_throttle_rate:.0%} max_concurrency={args.bedrock_max_concurrency}")
+    print(f"   caches {'enabled' if args.with_cache else 'disabled'}\n")
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = {(r["endpoint"], r["concurrency"]): r for r in json.load(f)["results"]}
+
+    results = []
+    print(table_header(bool(baseline)))
+    try:
+        for endpoint in endpoints:
+            for concurrency in levels:
+                result = asyncio.run(run_level(base_url, endpoint, concurrency, args.duration))
+                results.append(result)
+                print(table_row(result, baseline.get((endpoint, concurrency))))
+    finally:
+        server.should_exit = True
+    if not args.cassette:
+        print(f"\nUpstream calls: reddit={reddit.calls} bedrock={bedrock.calls} (throttled {bedrock.throttled})")
+    import main as app_module
+    print(f"Dedup: {app_module.dedup_stats.snapshot()}")
+    print(f"Speculation: {app_module.speculator.snapshot()}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"args": vars(args), "results": results}, f, indent=2)
+        print(f"💾 Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
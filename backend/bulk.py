@@ -0,0 +1,220 @@
+import time
+import uuid
+import asyncio
+import logging
+from typing import AsyncIterable, AsyncIterator, Awaitable, Callable, Iterable, Optional, Set, Tuple, Union
+
+from pydantic import ValidationError
+from pydantic_core import to_json
+
+from cache import CacheBackend
+from models import BulkItemError, BulkJob, PostWithComments, RedditPost
+
+logger = logging.getLogger(__name__)
+
+GeneratePost = Callable[[RedditPost], Awaitable[PostWithComments]]
+BulkItem = Union[RedditPost, BulkItemError]
+BulkResult = Union[PostWithComments, BulkItemError]
+
+
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in e['loc'])}: {e['msg']}" if e["loc"] else e["msg"]
+        for e in error.errors()
+    )
+
+
+async def parse_ndjson(chunks: AsyncIterable[bytes], max_line_bytes: int) -> AsyncIterator[Tuple[int, BulkItem]]:
+    """Validate an NDJSON byte stream into posts one line at a time.
+
+    Invalid lines become BulkItemErrors instead of failing the batch; a line
+    longer than ``max_line_bytes`` ends the stream, since nothing after it
+    can be trusted to start on a line boundary.
+    """
+    buffer = b""
+    number = 0
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            number += 1
+            if len(line) > max_line_bytes:
+                yield number, BulkItemError(line=number, error=f"Line exceeds {max_line_bytes} bytes")
+            elif line.strip():
+                yield number, _parse_line(number, line)
+        if len(buffer) > max_line_bytes:
+            yield number + 1, BulkItemError(line=number + 1, error=f"Line exceeds {max_line_bytes} bytes")
+            return
+
+    if buffer.strip():
+        yield number + 1, _parse_line(number + 1, buffer)
+
+
+def _parse_line(number: int, line: bytes) -> BulkItem:
+    try:
+        return RedditPost.model_validate_json(line)
+    except ValidationError as e:
+        return BulkItemError(line=number, error=_validation_message(e))
+
+
+async def _iterate(items: Iterable[Tuple[int, BulkItem]]) -> AsyncIterator[Tuple[int, BulkItem]]:
+    for item in items:
+        yield item
+
+
+async def process_bulk(
+    items: AsyncIterable[Tuple[int, BulkItem]],
+    generate: GeneratePost,
+    max_in_flight: int
+) -> AsyncIterator[BulkResult]:
+    """Generate suggestions for posts as they arrive, yielding results in completion order.
+
+    At most ``max_in_flight`` generations run at once. Reading stops while
+    the window is full, which pushes back on an uploading client, and
+    finished results wait for the consumer rather than piling up in memory.
+    """
+    results: "asyncio.Queue[Optional[BulkResult]]" = asyncio.Queue(maxsize=max_in_flight)
+    slots = asyncio.Semaphore(max_in_flight)
+    tasks: Set[asyncio.Task] = set()
+    loop = asyncio.get_event_loop()
+
+    async def run(number: int, post: RedditPost):
+        try:
+            result = await generate(post)
+        except Exception as e:
+            logger.error(f"Bulk generation failed for post {post.id}: {str(e)}")
+            result = BulkItemError(line=number, post_id=post.id, error=str(e))
+        try:
+            await results.put(result)
+        finally:
+            slots.release()
+
+    async def read():
+        try:
+            async for number, item in items:
+                if isinstance(item, BulkItemError):
+                    await results.put(item)
+                    continue
+                await slots.acquire()
+                task = loop.create_task(run(number, item))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        except Exception as e:
+            logger.error(f"Stopped reading bulk input: {str(e)}")
+            await results.put(BulkItemError(error=f"Failed to read input: {str(e)}"))
+
+        # Wait for every in-flight generation to hand over its result
+        for _ in range(max_in_flight):
+            await slots.acquire()
+        await results.put(None)
+
+    reader = loop.create_task(read())
+    try:
+        while True:
+            result = await results.get()
+            if result is None:
+                break
+            yield result
+    finally:
+        reader.cancel()
+        for task in list(tasks):
+            task.cancel()
+
+
+class BulkJobs:
+    """Bulk generations run in the background, polled by job id.
+
+    Progress and results are written to the cache backend as they complete,
+    so with a shared backend any worker can answer a poll, and memory use
+    does not grow with the size of the result set.
+    """
+
+    def __init__(self, cache: CacheBackend, ttl: int = 3600):
+        self.cache = cache
+        self.ttl = ttl
+        self._tasks: Set[asyncio.Task] = set()
+
+    @staticmethod
+    def _meta_key(job_id: str) -> str:
+        return f"bulk:{job_id}"
+
+    @staticmethod
+    def _result_key(job_id: str, index: int) -> str:
+        return f"bulk:{job_id}:{index}"
+
+    # Stored results are tagged so a page can be split into results and errors without guessing
+    _RESULT, _ERROR = b"R", b"E"
+
+    def start(
+        self, items: Iterable[Tuple[int, BulkItem]], total: int, generate: GeneratePost, max_in_flight: int
+    ) -> BulkJob:
+        job = BulkJob(job_id=uuid.uuid4().hex, status="running", total=total)
+        self._save(job)
+
+        task = asyncio.get_event_loop().create_task(self._run(job, items, generate, max_in_flight))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        logger.info(f"Started bulk job {job.job_id} for {total} items")
+        return job.model_copy(update={"next_offset": 0})
+
+    async def _run(self, job: BulkJob, items, generate: GeneratePost, max_in_flight: int):
+        started = time.monotonic()
+        loop = asyncio.get_event_loop()
+        try:
+            async for result in process_bulk(_iterate(items), generate, max_in_flight):
+                # Cache writes may hit the network (redis), so keep them off the event loop
+                await loop.run_in_executor(None, self._record, job, result)
+            job.status = "done"
+        except asyncio.CancelledError:
+            job.status = "cancelled"
+            raise
+        except Exception as e:
+            logger.error(f"Bulk job {job.job_id} failed: {str(e)}")
+            job.status = "failed"
+        finally:
+            self._save(job)
+            logger.info(
+                f"Bulk job {job.job_id} {job.status}: {job.completed} ok, {job.failed} failed "
+                f"in {time.monotonic() - started:.1f}s"
+            )
+
+    def _record(self, job: BulkJob, result: BulkResult):
+        index = job.completed + job.failed
+        tag = self._ERROR if isinstance(result, BulkItemError) else self._RESULT
+        self.cache.set(self._result_key(job.job_id, index), tag + to_json(result), self.ttl)
+        if tag == self._ERROR:
+            job.failed += 1
+        else:
+            job.completed += 1
+        self._save(job)
+
+    def _save(self, job: BulkJob):
+        meta = job.model_dump_json(exclude={"results", "errors", "next_offset"})
+        self.cache.set(self._meta_key(job.job_id), meta.encode("utf-8"), self.ttl)
+
+    def get(self, job_id: str, offset: int = 0, limit: int = 100) -> Optional[BulkJob]:
+        """Job progress plus one page of results, in completion order"""
+        entry = self.cache.get(self._meta_key(job_id))
+        if entry is None:
+            return None
+
+        job = BulkJob.model_validate_json(entry.value)
+        available = job.completed + job.failed
+        end = min(offset + limit, available)
+        for index in range(offset, end):
+            result = self.cache.get(self._result_key(job_id, index))
+            if result is None:
+                continue
+            tag, data = result.value[:1], result.value[1:]
+            if tag == self._ERROR:
+                job.errors.append(BulkItemError.model_validate_json(data))
+            else:
+                job.results.append(PostWithComments.model_validate_json(data))
+
+        if end < available or job.status == "running":
+            job.next_offset = max(end, offset)
+        return job
+
+    def cancel_all(self):
+        for task in list(self._tasks):
+            task.cancel()
@@ -0,0 +1,319 @@
+import os
+import asyncio
+import time
+import uuid
+import struct
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Executor
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Hashable, Iterator, NamedTuple, Optional
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class CacheEntry(NamedTuple):
+    value: bytes
+    stored_at: float
+
+    @property
+    def age(self) -> float:
+        """Seconds since the entry was stored"""
+        return time.time() - self.stored_at
+
+
+class CacheBackend:
+    """Base class for cache backends.
+
+    Values are serialized bytes so backends can be shared between worker
+    processes. Subclasses implement storage plus ``_try_acquire``/``_release``
+    for named locks; ``lock`` builds single-flight on top of those.
+    """
+
+    LOCK_POLL_INTERVAL = 0.05
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+    def _try_acquire(self, name: str, token: str, ttl: float) -> bool:
+        raise NotImplementedError
+
+    def _release(self, name: str, token: str) -> None:
+        raise NotImplementedError
+
+    @contextmanager
+    def lock(self, name: str, ttl: float = 60.0, wait: float = 60.0) -> Iterator[bool]:
+        """Hold a named lock shared by every worker using this backend.
+
+        Yields True when the lock was acquired. If it cannot be acquired within
+        ``wait`` seconds the body still runs (yielding False) so a stuck holder
+        degrades to duplicate work rather than a stalled request. ``ttl`` bounds
+        how long a crashed holder can keep the lock.
+        """
+        token = uuid.uuid4().hex
+        lock_name = f"lock:{name}"
+        deadline = time.monotonic() + wait
+        acquired = self._try_acquire(lock_name, token, ttl)
+        while not acquired and time.monotonic() < deadline:
+            time.sleep(self.LOCK_POLL_INTERVAL)
+            acquired = self._try_acquire(lock_name, token, ttl)
+
+        if not acquired:
+            logger.warning(f"Timed out waiting for lock {name}, continuing without it")
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                self._release(lock_name, token)
+
+
+class InFlightCalls:
+    """Coalesces identical concurrent calls within this process onto one executor job.
+
+    ``CacheBackend.lock`` makes waiters sleep-poll on an executor thread; joining
+    an in-flight asyncio future instead means only one thread per key waits on
+    the cross-process lock, and the rest of the executor stays free for other
+    requests. This also covers the case where caching is disabled and the lock
+    is skipped entirely.
+    """
+
+    def __init__(self, executor: Executor):
+        self.executor = executor
+        self._pending: Dict[Hashable, "asyncio.Future"] = {}
+
+    async def run(self, key: Hashable, fn: Callable[..., Any], *args) -> Any:
+        future = self._pending.get(key)
+        if future is None:
+            future = asyncio.get_event_loop().run_in_executor(self.executor, fn, *args)
+            self._pending[key] = future
+            future.add_done_callback(lambda _: self._pending.pop(key, None))
+        # Shielded so one cancelled caller does not cancel the call for the others
+        return await asyncio.shield(future)
+
+
+class MemoryCache(CacheBackend):
+    """Thread-safe in-process TTL cache with LRU eviction"""
+
+    def __init__(self, max_entries: int = 2048):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+
+            value, stored_at, expires_at = item
+            if expires_at <= time.time():
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return CacheEntry(value, stored_at)
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        if ttl <= 0:
+            return
+
+        now = time.time()
+        with self._lock:
+            self._entries[key] = (value, now, now + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._locks.clear()
+
+    def _try_acquire(self, name: str, token: str, ttl: float) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            holder = self._locks.get(name)
+            if holder is not None and holder[1] > now:
+                return False
+            self._locks[name] = (token, now + ttl)
+            return True
+
+    def _release(self, name: str, token: str) -> None:
+        with self._lock:
+            holder = self._locks.get(name)
+            if holder is not None and holder[0] == token:
+                del self._locks[name]
+
+
+class SQLiteConnections:
+    """Per-thread connections to one SQLite file, since sqlite3 connections must not be shared between threads"""
+
+    def __init__(self, path: str, row_factory: Optional[Callable] = None):
+        self.path = path
+        self.row_factory = row_factory
+        self._local = threading.local()
+
+    def get(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            if self.row_factory is not None:
+                conn.row_factory = self.row_factory
+            self._local.conn = conn
+        return conn
+
+
+class SQLiteCache(CacheBackend):
+    """Cache stored in a local SQLite file, shared by all workers on one host"""
+
+    PURGE_EVERY = 256
+
+    def __init__(self, path: str):
+        self.path = path
+        self._connections = SQLiteConnections(path)
+        self._writes = 0
+
+        conn = self._connection()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, stored_at REAL NOT NULL, expires_at REAL NOT NULL)"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS locks ("
+            "name TEXT PRIMARY KEY, token TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+
+    def _connection(self) -> sqlite3.Connection:
+        return self._connections.get()
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        row = self._connection().execute(
+            "SELECT value, stored_at FROM cache WHERE key = ? AND expires_at > ?",
+            (key, time.time())
+        ).fetchone()
+        if row is None:
+            return None
+        return CacheEntry(bytes(row[0]), row[1])
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        if ttl <= 0:
+            return
+
+        now = time.time()
+        conn = self._connection()
+        conn.execute(
+            "INSERT OR REPLACE INTO cache (key, value, stored_at, expires_at) VALUES (?, ?, ?, ?)",
+            (key, value, now, now + ttl)
+        )
+
+        self._writes += 1
+        if self._writes % self.PURGE_EVERY == 0:
+            conn.execute("DELETE FROM cache WHERE expires_at <= ?", (now,))
+
+    def delete(self, key: str) -> None:
+        self._connection().execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def clear(self) -> None:
+        conn = self._connection()
+        conn.execute("DELETE FROM cache")
+        conn.execute("DELETE FROM locks")
+
+    def _try_acquire(self, name: str, token: str, ttl: float) -> bool:
+        # Wall-clock time because expiry is compared across processes
+        now = time.time()
+        conn = self._connection()
+        conn.execute("DELETE FROM locks WHERE name = ? AND expires_at <= ?", (name, now))
+        cursor = conn.execute(
+            "INSERT OR IGNORE INTO locks (name, token, expires_at) VALUES (?, ?, ?)",
+            (name, token, now + ttl)
+        )
+        return cursor.rowcount == 1
+
+    def _release(self, name: str, token: str) -> None:
+        self._connection().execute("DELETE FROM locks WHERE name = ? AND token = ?", (name, token))
+
+
+class RedisCache(CacheBackend):
+    """Cache stored in a Redis-compatible server, shared by workers on any host"""
+
+    KEY_PREFIX = "reddit-auto-comments:"
+
+    # Delete the lock only if we still own it
+    _RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+    def __init__(self, url: str):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self._release_script = self.client.register_script(self._RELEASE_SCRIPT)
+
+    def _key(self, key: str) -> str:
+        return f"{self.KEY_PREFIX}{key}"
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        data = self.client.get(self._key(key))
+        if data is None:
+            return None
+        # Values are prefixed with their store time so callers can report age
+        stored_at, = struct.unpack("!d", data[:8])
+        return CacheEntry(data[8:], stored_at)
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        if ttl <= 0:
+            return
+        data = struct.pack("!d", time.time()) + value
+        self.client.set(self._key(key), data, px=int(ttl * 1000))
+
+    def delete(self, key: str) -> None:
+        self.client.delete(self._key(key))
+
+    def clear(self) -> None:
+        keys = list(self.client.scan_iter(match=f"{self.KEY_PREFIX}*"))
+        if keys:
+            self.client.delete(*keys)
+
+    def _try_acquire(self, name: str, token: str, ttl: float) -> bool:
+        return bool(self.client.set(self._key(name), token, nx=True, px=int(ttl * 1000)))
+
+    def _release(self, name: str, token: str) -> None:
+        self._release_script(keys=[self._key(name)], args=[token])
+
+
+def create_cache() -> CacheBackend:
+    """Build the cache backend selected by CACHE_BACKEND"""
+    backend = settings.CACHE_BACKEND.lower()
+    if backend == "memory":
+        return MemoryCache()
+    if backend == "sqlite":
+        os.makedirs(os.path.dirname(os.path.abspath(settings.CACHE_SQLITE_PATH)), exist_ok=True)
+        logger.info(f"Using SQLite cache at {settings.CACHE_SQLITE_PATH}")
+        return SQLiteCache(settings.CACHE_SQLITE_PATH)
+    if backend == "redis":
+        logger.info(f"Using Redis cache at {settings.REDIS_URL}")
+        return RedisCache(settings.REDIS_URL)
+    raise ValueError(f"Unknown CACHE_BACKEND: {settings.CACHE_BACKEND}")
@@ -1,4 +1,5 @@
 import os
+import tempfile
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -19,11 +20,72 @@ class Settings:
     BACKEND_PORT = int(os.getenv("BACKEND_PORT", 8000))
     CORS_ORIGINS = os.getenv("CORS_ORIGINS", "http://localhost:3000").split(",")
     
+    # Build the Reddit and Bedrock clients in the background at startup
+    WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "true").lower() == "true"
+    
     # Bedrock Model Configuration
     BEDROCK_MODEL_ID = "anthropic.claude-3-sonnet-20240229-v1:0"
     
+    # Cache Configuration (seconds, 0 disables)
+    LISTING_CACHE_TTL = int(os.getenv("LISTING_CACHE_TTL", 60))
+    SUGGESTION_CACHE_TTL = int(os.getenv("SUGGESTION_CACHE_TTL", 3600))
+    
+    # Cache backend shared by workers: memory (per process), sqlite (per host) or redis
+    CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")
+    CACHE_SQLITE_PATH = os.getenv(
+        "CACHE_SQLITE_PATH", os.path.join(tempfile.gettempdir(), "reddit-auto-comments-cache.db")
+    )
+    REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+    
+    # Generate once per group of crossposts/near-duplicate posts (SimHash Hamming distance)
+    DEDUP_ENABLED = os.getenv("DEDUP_ENABLED", "true").lower() == "true"
+    DEDUP_MAX_DISTANCE = int(os.getenv("DEDUP_MAX_DISTANCE", 3))
+    
+    # Multi-subreddit ranking: score, velocity or comment_velocity (per-hour with age decay)
+    RANKING_SCORER = os.getenv("RANKING_SCORER", "velocity")
+    RANKING_NORMALIZE = os.getenv("RANKING_NORMALIZE", "false").lower() == "true"
+    RANKING_GRAVITY = float(os.getenv("RANKING_GRAVITY", 1.5))
+    MULTI_TOP_K = int(os.getenv("MULTI_TOP_K", 10))
+    
+    # Durable history of fetched posts and generated suggestions (SQLite, WAL mode)
+    STORE_ENABLED = os.getenv("STORE_ENABLED", "true").lower() == "true"
+    STORE_PATH = os.getenv("STORE_PATH", "data/history.db")
+    
+    # Start generating suggestions for posts-only results before the client asks for them
+    SPECULATIVE_GENERATION = os.getenv("SPECULATIVE_GENERATION", "false").lower() == "true"
+    SPECULATIVE_WORKERS = int(os.getenv("SPECULATIVE_WORKERS", 2))
+    SPECULATIVE_MAX_PENDING = int(os.getenv("SPECULATIVE_MAX_PENDING", 50))
+    SPECULATIVE_TTL = float(os.getenv("SPECULATIVE_TTL", 60))
+    
+    # WebSocket feed: one shared poller per subscribed subreddit
+    FEED_POLL_INTERVAL = float(os.getenv("FEED_POLL_INTERVAL", 60))
+    FEED_POST_LIMIT = int(os.getenv("FEED_POST_LIMIT", 10))
+    FEED_MAX_SUBREDDITS = int(os.getenv("FEED_MAX_SUBREDDITS", 10))
+    
+    # Bulk NDJSON generation: concurrent generations per batch, input limits and job retention
+    BULK_MAX_IN_FLIGHT = int(os.getenv("BULK_MAX_IN_FLIGHT", 8))
+    BULK_MAX_LINE_BYTES = int(os.getenv("BULK_MAX_LINE_BYTES", 262144))
+    BULK_MAX_JOB_POSTS = int(os.getenv("BULK_MAX_JOB_POSTS", 10000))
+    BULK_JOB_TTL = int(os.getenv("BULK_JOB_TTL", 3600))
+    
+    # Upstream traffic mode: live, record (write a cassette) or replay (serve a cassette offline)
+    UPSTREAM_MODE = os.getenv("UPSTREAM_MODE", "live").lower()
+    CASSETTE_PATH = os.getenv("CASSETTE_PATH", "cassettes/upstream.jsonl.gz")
+    # Replay timing: 1.0 keeps recorded latencies, 2.0 halves them, 0 replays instantly
+    REPLAY_SPEED = float(os.getenv("REPLAY_SPEED", 1.0))
+    
+    # Response compression threshold (bytes)
+    COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", 1024))
+    
     def validate_config(self):
         """Validate that all required environment variables are set"""
+        if self.UPSTREAM_MODE not in ("live", "record", "replay"):
+            raise ValueError(f"Invalid UPSTREAM_MODE: {self.UPSTREAM_MODE}")
+        
+        # Replay serves everything from the cassette, so no credentials are needed
+        if self.UPSTREAM_MODE == "replay":
+            return
+        
         required_vars = [
             "REDDIT_CLIENT_ID",
             "REDDIT_CLIENT_SECRET",
@@ -0,0 +1,165 @@
+import re
+import hashlib
+import threading
+from typing import Dict, List, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+from models import CommentSuggestion, RedditPost
+
+# Query parameters that never change what a link points to
+TRACKING_PARAMS = {"fbclid", "gclid", "ref", "ref_src", "si", "share_id", "context"}
+
+_REDDIT_COMMENTS = re.compile(r"/comments/([a-z0-9]+)", re.IGNORECASE)
+_TOKEN = re.compile(r"[a-z0-9']+")
+
+SIMHASH_BITS = 64
+# Below this many tokens a SimHash is too noisy to call two posts duplicates
+MIN_SIMHASH_TOKENS = 6
+
+
+def canonical_url(url: str) -> Optional[str]:
+    """Normalize a link so reposts and crossposts of the same target compare equal"""
+    if not url:
+        return None
+
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    for prefix in ("www.", "m.", "old.", "new.", "np."):
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+            break
+
+    # Self posts and crossposts both point at a reddit comments page
+    if host in ("reddit.com", "redd.it"):
+        match = _REDDIT_COMMENTS.search(parts.path)
+        if match:
+            return f"reddit:{match.group(1).lower()}"
+        if host == "redd.it" and parts.path.strip("/"):
+            return f"reddit:{parts.path.strip('/').lower()}"
+
+    if host == "youtu.be" and parts.path.strip("/"):
+        return f"youtube:{parts.path.strip('/')}"
+    if host == "youtube.com" and parts.path == "/watch":
+        video = dict(parse_qsl(parts.query)).get("v")
+        if video:
+            return f"youtube:{video}"
+
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith("utm_") and k.lower() not in TRACKING_PARAMS
+    )
+    path = parts.path.rstrip("/") or "/"
+    return f"{host}{path}" + (f"?{urlencode(query)}" if query else "")
+
+
+def simhash(text: str) -> Optional[int]:
+    """64-bit SimHash over word unigrams and bigrams, or None for very short text"""
+    tokens = _TOKEN.findall(text.lower())
+    if len(tokens) < MIN_SIMHASH_TOKENS:
+        return None
+
+    features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+    weights = [0] * SIMHASH_BITS
+    for feature in features:
+        h = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "big")
+        for bit in range(SIMHASH_BITS):
+            weights[bit] += 1 if h >> bit & 1 else -1
+
+    fingerprint = 0
+    for bit, weight in enumerate(weights):
+        if weight > 0:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+def _post_text(post: RedditPost) -> str:
+    content = post.content
+    # Link posts carry only the URL as content, which canonical_url already covers
+    if content.startswith("Link post: "):
+        content = ""
+    return f"{post.title}\n{content}"
+
+
+def group_duplicates(posts: List[RedditPost], max_distance: int = 3) -> List[List[int]]:
+    """Group post indices by canonical URL or near-identical title and content.
+
+    Groups are returned in order of their first post, and each group lists its
+    members in input order, so the first index is the group leader.
+    """
+    parent = list(range(len(posts)))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def union(a: int, b: int):
+        ra, rb = find(a), find(b)
+        if ra != rb:
+            parent[max(ra, rb)] = min(ra, rb)
+
+    by_url: Dict[str, int] = {}
+    fingerprints = []
+    for i, post in enumerate(posts):
+        url = canonical_url(post.url)
+        if url is not None:
+            if url in by_url:
+                union(by_url[url], i)
+            else:
+                by_url[url] = i
+
+        fingerprint = simhash(_post_text(post))
+        if fingerprint is not None:
+            for j, other in fingerprints:
+                if bin(fingerprint ^ other).count("1") <= max_distance:
+                    union(j, i)
+            fingerprints.append((i, fingerprint))
+
+    groups: Dict[int, List[int]] = {}
+    for i in range(len(posts)):
+        groups.setdefault(find(i), []).append(i)
+    return sorted(groups.values(), key=lambda members: members[0])
+
+
+def retailor_suggestions(
+    suggestions: List[CommentSuggestion], source: RedditPost, target: RedditPost
+) -> List[CommentSuggestion]:
+    """Reuse a group leader's suggestions for another post, swapping subreddit mentions"""
+    if source.subreddit.lower() == target.subreddit.lower():
+        return suggestions
+
+    mention = re.compile(rf"\br/{re.escape(source.subreddit)}\b", re.IGNORECASE)
+    replacement = f"r/{target.subreddit}"
+    return [
+        CommentSuggestion(
+            comment=mention.sub(replacement, s.comment),
+            tone=s.tone,
+            reasoning=mention.sub(replacement, s.reasoning)
+        )
+        for s in suggestions
+    ]
+
+
+class DedupStats:
+    """Running totals of how many generations deduplication avoided"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.posts = 0
+        self.generations = 0
+
+    def record(self, posts: int, generations: int):
+        with self._lock:
+            self.posts += posts
+            self.generations += generations
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            saved = self.posts - self.generations
+            return {
+                "posts": self.posts,
+                "generations": self.generations,
+                "saved": saved,
+                "saved_fraction": round(saved / self.posts, 4) if self.posts else 0.0,
+            }
@@ -0,0 +1,204 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+
+from pydantic_core import to_json
+
+from models import PostWithComments, RedditPost
+
+logger = logging.getLogger(__name__)
+
+FetchPosts = Callable[[str, int], Awaitable[List[RedditPost]]]
+GenerateSuggestions = Callable[[List[RedditPost]], Awaitable[List[PostWithComments]]]
+
+
+class Subscriber:
+    """One connected client: a bounded queue of encoded events to send"""
+
+    def __init__(self, max_queue: int = 100):
+        self.queue: "asyncio.Queue[Optional[str]]" = asyncio.Queue(maxsize=max_queue)
+        self.subreddits: Set[str] = set()
+
+    def deliver(self, message: str) -> bool:
+        """Queue an event, returning False if the client has fallen too far behind"""
+        try:
+            self.queue.put_nowait(message)
+            return True
+        except asyncio.QueueFull:
+            return False
+
+    def close(self, message: Optional[str] = None):
+        """Replace anything still queued with a final message and the end-of-stream marker"""
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        if message is not None:
+            self.queue.put_nowait(message)
+        self.queue.put_nowait(None)
+
+
+def encode_event(event: dict) -> str:
+    return to_json(event).decode("utf-8")
+
+
+class SubredditPoller:
+    """Polls one subreddit on behalf of all its subscribers and fans out what changed"""
+
+    def __init__(self, hub: "SubscriptionHub", subreddit: str):
+        self.hub = hub
+        self.subreddit = subreddit
+        self.subscribers: Set[Subscriber] = set()
+        self.posts: Dict[str, RedditPost] = {}
+        self.suggestions: Dict[str, PostWithComments] = {}
+        self.ready = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+
+    def start(self):
+        self.task = asyncio.get_event_loop().create_task(self._run())
+
+    def snapshot_event(self) -> str:
+        items = [
+            self.suggestions.get(post_id) or PostWithComments(post=post, comment_suggestions=[])
+            for post_id, post in self.posts.items()
+        ]
+        return encode_event({"type": "snapshot", "subreddit": self.subreddit, "posts": items})
+
+    def broadcast(self, event: dict):
+        # Encoded once, however many clients receive it
+        message = encode_event(event)
+        for subscriber in list(self.subscribers):
+            if not subscriber.deliver(message):
+                logger.warning(f"Dropping slow feed subscriber of r/{self.subreddit}")
+                self.hub.drop(subscriber, "Subscriber fell too far behind")
+
+    async def _run(self):
+        while True:
+            try:
+                await self._poll()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Feed poll of r/{self.subreddit} failed: {str(e)}")
+                self.broadcast({"type": "error", "subreddit": self.subreddit, "detail": str(e)})
+            finally:
+                self.ready.set()
+            await asyncio.sleep(self.hub.interval)
+
+    async def _poll(self):
+        posts = await self.hub.fetch(self.subreddit, self.hub.limit)
+        self.hub.polls += 1
+        first_poll = not self.ready.is_set()
+
+        new_posts = [post for post in posts if post.id not in self.posts]
+        changes = [
+            {"id": post.id, "score": post.score, "num_comments": post.num_comments}
+            for post in posts
+            if post.id in self.posts
+            and (post.score, post.num_comments) != (self.posts[post.id].score, self.posts[post.id].num_comments)
+        ]
+        self.posts = {post.id: post for post in posts}
+        self.suggestions = {post_id: item for post_id, item in self.suggestions.items() if post_id in self.posts}
+
+        if first_poll:
+            # Subscribers waiting on the first poll get everything as their snapshot
+            message = self.snapshot_event()
+            for subscriber in list(self.subscribers):
+                subscriber.deliver(message)
+        else:
+            if new_posts:
+                self.broadcast({"type": "new_posts", "subreddit": self.subreddit, "posts": new_posts})
+            if changes:
+                self.broadcast({"type": "score_changes", "subreddit": self.subreddit, "changes": changes})
+
+        if new_posts and self.hub.generate is not None:
+            for item in await self.hub.generate(new_posts):
+                if item.post.id in self.posts:
+                    self.suggestions[item.post.id] = item
+                    self.broadcast({
+                        "type": "suggestions",
+                        "subreddit": self.subreddit,
+                        "post_id": item.post.id,
+                        "comment_suggestions": item.comment_suggestions,
+                    })
+
+
+class SubscriptionHub:
+    """Shares one upstream poller per subreddit among every subscribed client.
+
+    Upstream load therefore grows with the number of distinct subreddits being
+    watched, not with the number of connections. A poller starts with its first
+    subscriber and stops when its last one leaves.
+    """
+
+    def __init__(
+        self,
+        fetch: FetchPosts,
+        generate: Optional[GenerateSuggestions] = None,
+        interval: float = 60.0,
+        limit: int = 10,
+        max_queue: int = 100
+    ):
+        self.fetch = fetch
+        self.generate = generate
+        self.interval = interval
+        self.limit = limit
+        self.max_queue = max_queue
+        self.pollers: Dict[str, SubredditPoller] = {}
+        self.subscribers: Set[Subscriber] = set()
+        self.polls = 0
+
+    def connect(self) -> Subscriber:
+        subscriber = Subscriber(self.max_queue)
+        self.subscribers.add(subscriber)
+        return subscriber
+
+    def subscribe(self, subscriber: Subscriber, subreddit: str):
+        key = subreddit.lower()
+        if key in subscriber.subreddits:
+            return
+        subscriber.subreddits.add(key)
+
+        poller = self.pollers.get(key)
+        if poller is None:
+            poller = self.pollers[key] = SubredditPoller(self, subreddit)
+            poller.subscribers.add(subscriber)
+            poller.start()
+            logger.info(f"Started feed poller for r/{subreddit}")
+        else:
+            poller.subscribers.add(subscriber)
+            # Late joiners start from the shared state instead of triggering a fetch
+            if poller.ready.is_set():
+                subscriber.deliver(poller.snapshot_event())
+
+    def unsubscribe(self, subscriber: Subscriber, subreddit: str):
+        key = subreddit.lower()
+        subscriber.subreddits.discard(key)
+        poller = self.pollers.get(key)
+        if poller is None:
+            return
+        poller.subscribers.discard(subscriber)
+        if not poller.subscribers:
+            poller.task.cancel()
+            del self.pollers[key]
+            logger.info(f"Stopped feed poller for r/{poller.subreddit}")
+
+    def disconnect(self, subscriber: Subscriber):
+        for subreddit in list(subscriber.subreddits):
+            self.unsubscribe(subscriber, subreddit)
+        self.subscribers.discard(subscriber)
+
+    def drop(self, subscriber: Subscriber, reason: str):
+        """Disconnect a subscriber from the server side, telling it why"""
+        self.disconnect(subscriber)
+        subscriber.close(encode_event({"type": "error", "detail": reason}))
+
+    def close(self):
+        for subscriber in list(self.subscribers):
+            self.disconnect(subscriber)
+            subscriber.close()
+
+    def snapshot(self) -> dict:
+        return {
+            "subreddits": len(self.pollers),
+            "subscribers": len(self.subscribers),
+            "polls": self.polls,
+        }
@@ -1,14 +1,33 @@
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, HTTPException, Query, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from typing import List, Optional
+from datetime import datetime
 import logging
 import asyncio
+from pydantic_core import to_json
 from concurrent.futures import ThreadPoolExecutor
 
 from config import settings
-from models import PostWithComments, RedditPost, ErrorResponse
+from models import CommentSuggestion, PostWithComments, RedditPost, HistoryPage, BulkJob, ErrorResponse
 from reddit_service import RedditService
-from bedrock_service import BedrockService
+from bedrock_service import BedrockService, Generation, TONES, parse_tones
+from cache import InFlightCalls, MemoryCache, create_cache
+from dedup import DedupStats, group_duplicates, retailor_suggestions
+from ranking import Ranker
+from store import PostStore
+from recorder import close_cassette
+from speculation import SpeculativeGenerator
+from feed import SubscriptionHub, encode_event
+from bulk import BulkJobs, parse_ndjson, process_bulk
+from responses import (
+    FastJSONResponse, NDJSONStreamingResponse, conditional_json_response, make_etag, not_modified_response
+)
+
+try:
+    from brotli_asgi import BrotliMiddleware
+except ImportError:  # brotli is optional, gzip covers every client
+    BrotliMiddleware = None
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -18,7 +37,8 @@ logger = logging.getLogger(__name__)
 app = FastAPI(
     title="Reddit Auto Comments API",
     description="Fetches Reddit posts and generates AI-powered comment suggestions",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=FastJSONResponse
 )
 
 # Configure CORS
@@ -28,13 +48,152 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
 
-# Initialize services
-reddit_service = RedditService()
-bedrock_service = BedrockService()
+# Compress large JSON bodies (brotli when available, falling back to gzip)
+if BrotliMiddleware is not None:
+    app.add_middleware(BrotliMiddleware, minimum_size=settings.COMPRESSION_MIN_SIZE)
+else:
+    app.add_middleware(GZipMiddleware, minimum_size=settings.COMPRESSION_MIN_SIZE)
+
+# Initialize services (the cache backend is shared across workers unless CACHE_BACKEND=memory)
+cache = create_cache()
+store = PostStore(settings.STORE_PATH) if settings.STORE_ENABLED else None
+reddit_service = RedditService(cache=cache, store=store)
+bedrock_service = BedrockService(cache=cache)
 executor = ThreadPoolExecutor(max_workers=4)
 
+dedup_stats = DedupStats()
+speculator = SpeculativeGenerator(
+    bedrock_service,
+    max_workers=settings.SPECULATIVE_WORKERS,
+    max_pending=settings.SPECULATIVE_MAX_PENDING,
+    ttl=settings.SPECULATIVE_TTL
+)
+
+def generation_groups(posts: List[RedditPost]) -> List[List[int]]:
+    """Group post indices that share one generation, led by the group's first post"""
+    # Crossposts and near-duplicates share one generation
+    if settings.DEDUP_ENABLED:
+        return group_duplicates(posts, settings.DEDUP_MAX_DISTANCE)
+    return [[i] for i in range(len(posts))]
+
+# Identical concurrent upstream calls share one executor job instead of queueing behind a lock
+in_flight = InFlightCalls(executor)
+
+async def fetch_hot_posts(subreddit: str, limit: int) -> List[RedditPost]:
+    """Fetch a listing on the executor, joining an identical fetch already in flight"""
+    key = ("listing", subreddit.lower(), limit)
+    return await in_flight.run(key, reddit_service.fetch_hot_posts, subreddit, limit)
+
+async def generate_suggestions(
+    post: RedditPost, tones: Optional[List[str]] = None, refresh: bool = False
+) -> Generation:
+    """Generate suggestions on the executor, joining an identical generation already in flight"""
+    key = ("suggestions", post.id, post.title, post.content, tuple(tones or TONES), refresh)
+    return await in_flight.run(key, bedrock_service.generate, post, tones, refresh)
+
+# Shared by every WebSocket client; pollers go through the listing cache like any request
+feed_hub = SubscriptionHub(
+    fetch_hot_posts,
+    lambda posts: generate_posts_with_comments(posts),
+    interval=settings.FEED_POLL_INTERVAL,
+    limit=settings.FEED_POST_LIMIT
+)
+
+# Job results go to the shared cache so any worker can serve a poll; a per-process memory
+# cache gains nothing from sharing, so jobs get their own to avoid evicting suggestions
+bulk_jobs = BulkJobs(
+    cache if settings.CACHE_BACKEND != "memory" else MemoryCache(max_entries=4 * settings.BULK_MAX_JOB_POSTS),
+    ttl=settings.BULK_JOB_TTL
+)
+
+def tone_selection(tones: Optional[str]) -> Optional[List[str]]:
+    """Parse the `tones` query parameter, rejecting unknown tones with a 400"""
+    try:
+        return parse_tones(tones)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def record_suggestions(post: RedditPost, generated: List[CommentSuggestion]):
+    """Queue newly generated model output for the history store (cache hits and fallbacks are not new)"""
+    if store is not None and generated:
+        store.save_suggestions(post, generated, settings.BEDROCK_MODEL_ID)
+
+async def generate_posts_with_comments(
+    posts: List[RedditPost],
+    use_speculation: bool = False,
+    tones: Optional[List[str]] = None,
+    refresh: bool = False
+) -> List[PostWithComments]:
+    """Generate comment suggestions (all tones unless a subset is given) for posts concurrently"""
+    groups = generation_groups(posts)
+    
+    tasks = []
+    for group in groups:
+        leader = posts[group[0]]
+        # Pick up generation already started by a preceding posts-only request (always all tones)
+        speculative = None
+        if use_speculation and tones is None and not refresh:
+            speculative = speculator.claim(leader, expected=settings.SPECULATIVE_GENERATION)
+        if speculative is not None:
+            tasks.append(asyncio.wrap_future(speculative))
+        else:
+            tasks.append(generate_suggestions(leader, tones, refresh))
+    generations = await asyncio.gather(*tasks)
+    
+    all_suggestions = [None] * len(posts)
+    for group, generation in zip(groups, generations):
+        leader = posts[group[0]]
+        for i in group:
+            all_suggestions[i] = retailor_suggestions(generation.suggestions, leader, posts[i])
+            # Followers are recorded with their own retailored copy of what the leader's call generated
+            if generation.generated:
+                record_suggestions(posts[i], retailor_suggestions(generation.generated, leader, posts[i]))
+    
+    dedup_stats.record(len(posts), len(groups))
+    if len(groups) < len(posts):
+        logger.info(f"Deduplicated {len(posts)} posts into {len(groups)} generations")
+    
+    # Endpoints return these via FastJSONResponse, which skips response_model validation
+    return [
+        PostWithComments(post=post, comment_suggestions=suggestions)
+        for post, suggestions in zip(posts, all_suggestions)
+    ]
+
+def suggestions_etag(posts: List[RedditPost], tones: Optional[List[str]]) -> Optional[str]:
+    """Validator for posts with suggestions, built from the listing and the suggestion cache.
+    
+    Needs no generation, so revalidating clients can get a 304 before Bedrock is
+    called. None while any group leader's suggestions are not cached, since the
+    response would then change.
+    """
+    parts = [to_json(posts), ",".join(tones or TONES).encode("utf-8")]
+    for group in generation_groups(posts):
+        fingerprint = bedrock_service.suggestions_fingerprint(posts[group[0]], tones)
+        if fingerprint is None:
+            return None
+        parts.append(fingerprint)
+    return make_etag(*parts)
+
+async def cached_suggestions_etag(
+    request: Request, posts: List[RedditPost], tones: Optional[List[str]], force: bool = False
+) -> Optional[str]:
+    # Only worth the cache lookups when the client is revalidating (or the response is ready)
+    if not force and not request.headers.get("if-none-match"):
+        return None
+    return await asyncio.get_event_loop().run_in_executor(executor, suggestions_etag, posts, tones)
+
+def warm_up_clients():
+    """Build the heavy upstream clients ahead of the first request"""
+    try:
+        reddit_service.reddit
+        bedrock_service.bedrock_client
+        logger.info("Upstream clients warmed up")
+    except Exception as e:
+        logger.error(f"Client warm-up failed: {str(e)}")
+
 @app.on_event("startup")
 async def startup_event():
     """Validate configuration on startup"""
@@ -44,6 +203,20 @@ async def startup_event():
     except ValueError as e:
         logger.error(f"Configuration error: {str(e)}")
         raise
+    
+    # Warm up in the background so startup (and --reload) is not blocked on boto3/praw
+    if settings.WARMUP_ON_STARTUP:
+        asyncio.get_event_loop().run_in_executor(executor, warm_up_clients)
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop feed pollers, cancel speculative work and write out any queued history and recordings"""
+    feed_hub.close()
+    bulk_jobs.cancel_all()
+    speculator.cancel_all()
+    if store is not None:
+        store.flush()
+    close_cassette()
 
 @app.get("/")
 async def root():
@@ -53,25 +226,175 @@ async def root():
 async def health_check():
     return {"status": "healthy", "service": "reddit-auto-comments"}
 
+@app.get("/ready")
+async def readiness_check():
+    """Report whether the upstream clients have been initialized"""
+    clients = {
+        "reddit": reddit_service.is_initialized,
+        "bedrock": bedrock_service.is_initialized,
+    }
+    ready = all(clients.values())
+    return FastJSONResponse(
+        {"status": "ready" if ready else "warming_up", "clients": clients},
+        status_code=200 if ready else 503
+    )
+
+@app.get("/stats")
+async def stats():
+    """Report how much upstream work the optimizations are saving"""
+    return FastJSONResponse({
+        "dedup": dedup_stats.snapshot(),
+        "speculation": speculator.snapshot(),
+        "feed": feed_hub.snapshot(),
+    })
+
+def _require_store() -> PostStore:
+    if store is None:
+        raise HTTPException(status_code=503, detail="History store is disabled (STORE_ENABLED=false)")
+    return store
+
+@app.get("/history/search", response_model=HistoryPage)
+async def search_history(
+    q: str = Query(..., min_length=1, description="Words to find in stored post titles and content"),
+    subreddit: Optional[str] = Query(default=None, description="Restrict results to one subreddit"),
+    limit: int = Query(default=20, ge=1, le=100, description="Posts per page"),
+    cursor: Optional[str] = Query(default=None, description="next_cursor from the previous page"),
+    model_id: Optional[str] = Query(default=None, description="Only suggestions from this model")
+):
+    """Search stored posts and their suggestions without calling Reddit or Bedrock"""
+    history_store = _require_store()
+    q = q.strip()
+    if not q:
+        raise HTTPException(status_code=400, detail="Search query must contain at least one word")
+    try:
+        items, next_cursor = await asyncio.get_event_loop().run_in_executor(
+            executor, lambda: history_store.history(
+                subreddit=subreddit, limit=limit, cursor=cursor, model_id=model_id, query=q
+            )
+        )
+        return FastJSONResponse(HistoryPage(items=items, next_cursor=next_cursor))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error searching history: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+@app.get("/history/{subreddit}", response_model=HistoryPage)
+async def get_history(
+    subreddit: str,
+    limit: int = Query(default=20, ge=1, le=100, description="Posts per page"),
+    cursor: Optional[str] = Query(default=None, description="next_cursor from the previous page"),
+    since: Optional[datetime] = Query(default=None, description="Only posts created at or after this time"),
+    until: Optional[datetime] = Query(default=None, description="Only posts created before this time"),
+    model_id: Optional[str] = Query(default=None, description="Only suggestions from this model")
+):
+    """Page through stored posts and suggestions for a subreddit, newest first"""
+    history_store = _require_store()
+    try:
+        items, next_cursor = await asyncio.get_event_loop().run_in_executor(
+            executor, lambda: history_store.history(
+                subreddit=subreddit, limit=limit, cursor=cursor, since=since, until=until, model_id=model_id
+            )
+        )
+        return FastJSONResponse(HistoryPage(items=items, next_cursor=next_cursor))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error reading history for r/{subreddit}: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+# Declared before /posts/{subreddit} so "multi" is not taken as a subreddit name
+@app.get("/posts/multi", response_model=List[PostWithComments])
+async def get_posts_from_multiple_subreddits(
+    request: Request,
+    subreddits: str = Query(..., description="Comma-separated list of subreddits"),
+    posts_per_subreddit: int = Query(default=3, ge=1, le=5, description="Posts per subreddit"),
+    rank_by: Optional[str] = Query(default=None, description="Ranking: score, velocity or comment_velocity"),
+    normalize: Optional[bool] = Query(default=None, description="Normalize scores per subreddit"),
+    tones: Optional[str] = Query(default=None, description=f"Comma-separated subset of {', '.join(TONES)}")
+):
+    """Fetch posts from multiple subreddits and generate comment suggestions"""
+    try:
+        subreddit_list = [s.strip() for s in subreddits.split(",") if s.strip()]
+        
+        if not subreddit_list:
+            raise HTTPException(status_code=400, detail="No valid subreddits provided")
+        
+        if len(subreddit_list) > 10:
+            raise HTTPException(status_code=400, detail="Maximum 10 subreddits allowed")
+        
+        tone_list = tone_selection(tones)
+        
+        try:
+            ranker = Ranker(
+                rank_by or settings.RANKING_SCORER,
+                settings.RANKING_NORMALIZE if normalize is None else normalize,
+                settings.RANKING_GRAVITY
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+        logger.info(f"Fetching posts from subreddits: {subreddit_list}")
+        
+        # Fetch and rank posts from multiple subreddits; only the top k go on to generation
+        posts = await asyncio.get_event_loop().run_in_executor(
+            executor, reddit_service.fetch_multiple_subreddits,
+            subreddit_list, posts_per_subreddit, settings.MULTI_TOP_K, ranker
+        )
+        
+        if not posts:
+            raise HTTPException(status_code=404, detail="No posts found in specified subreddits")
+        
+        max_age = min(
+            reddit_service.listing_ttl_remaining(name, posts_per_subreddit) for name in subreddit_list
+        )
+        not_modified = not_modified_response(
+            request, await cached_suggestions_etag(request, posts, tone_list), max_age
+        )
+        if not_modified is not None:
+            return not_modified
+        
+        # Generate comments for each post concurrently
+        posts_with_comments = await generate_posts_with_comments(posts, tones=tone_list)
+        
+        logger.info(f"Successfully processed {len(posts_with_comments)} posts from multiple subreddits")
+        etag = await cached_suggestions_etag(request, posts, tone_list, force=True)
+        return conditional_json_response(request, posts_with_comments, max_age, etag)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error processing multi-subreddit request: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
 @app.get("/posts/{subreddit}/posts-only", response_model=List[RedditPost])
 async def get_posts_only(
+    request: Request,
     subreddit: str,
-    limit: int = Query(default=10, ge=1, le=25, description="Number of posts to fetch")
+    limit: int = Query(default=10, ge=1, le=25, description="Number of posts to fetch"),
+    speculate: Optional[bool] = Query(
+        default=None, description="Start generating suggestions in the background (default: SPECULATIVE_GENERATION)"
+    )
 ):
     """Fetch hot posts from a subreddit without comment suggestions (for lazy loading)"""
     try:
         logger.info(f"Fetching {limit} posts only from r/{subreddit}")
         
         # Fetch posts from Reddit (no comments)
-        posts = await asyncio.get_event_loop().run_in_executor(
-            executor, reddit_service.fetch_hot_posts, subreddit, limit
-        )
+        posts = await fetch_hot_posts(subreddit, limit)
         
         if not posts:
             raise HTTPException(status_code=404, detail=f"No posts found in r/{subreddit}")
         
         logger.info(f"Successfully fetched {len(posts)} posts from r/{subreddit}")
-        return posts
+        
+        # The lazy-loading frontend asks for suggestions next; get a head start on them
+        if settings.SPECULATIVE_GENERATION if speculate is None else speculate:
+            speculator.schedule([posts[group[0]] for group in generation_groups(posts)])
+        
+        return conditional_json_response(
+            request, posts, reddit_service.listing_ttl_remaining(subreddit, limit)
+        )
         
     except HTTPException:
         raise
@@ -81,42 +404,36 @@ async def get_posts_only(
 
 @app.get("/posts/{subreddit}", response_model=List[PostWithComments])
 async def get_posts_with_comments(
+    request: Request,
     subreddit: str,
-    limit: int = Query(default=3, ge=1, le=25, description="Number of posts to fetch")
+    limit: int = Query(default=3, ge=1, le=25, description="Number of posts to fetch"),
+    tones: Optional[str] = Query(default=None, description=f"Comma-separated subset of {', '.join(TONES)}")
 ):
     """Fetch hot posts from a subreddit and generate comment suggestions"""
     try:
+        tone_list = tone_selection(tones)
         logger.info(f"Fetching {limit} posts from r/{subreddit}")
         
         # Fetch posts from Reddit
-        posts = await asyncio.get_event_loop().run_in_executor(
-            executor, reddit_service.fetch_hot_posts, subreddit, limit
-        )
+        posts = await fetch_hot_posts(subreddit, limit)
         
         if not posts:
             raise HTTPException(status_code=404, detail=f"No posts found in r/{subreddit}")
         
-        # Generate comments for each post concurrently
-        tasks = []
-        for post in posts:
-            task = asyncio.get_event_loop().run_in_executor(
-                executor, bedrock_service.generate_comment_suggestions, post
-            )
-            tasks.append(task)
-        
-        # Wait for all comment generation tasks to complete
-        all_suggestions = await asyncio.gather(*tasks)
+        # Revalidation is answered from the listing and suggestion cache, before any generation
+        max_age = reddit_service.listing_ttl_remaining(subreddit, limit)
+        not_modified = not_modified_response(
+            request, await cached_suggestions_etag(request, posts, tone_list), max_age
+        )
+        if not_modified is not None:
+            return not_modified
         
-        # Combine posts with their comment suggestions
-        posts_with_comments = []
-        for post, suggestions in zip(posts, all_suggestions):
-            posts_with_comments.append(PostWithComments(
-                post=post,
-                comment_suggestions=suggestions
-            ))
+        # Generate comments for each post concurrently
+        posts_with_comments = await generate_posts_with_comments(posts, tones=tone_list)
         
         logger.info(f"Successfully processed {len(posts_with_comments)} posts")
-        return posts_with_comments
+        etag = await cached_suggestions_etag(request, posts, tone_list, force=True)
+        return conditional_json_response(request, posts_with_comments, max_age, etag)
         
     except HTTPException:
         raise
@@ -124,90 +441,179 @@ async def get_posts_with_comments(
         logger.error(f"Error processing request: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
-@app.get("/posts/multi", response_model=List[PostWithComments])
-async def get_posts_from_multiple_subreddits(
-    subreddits: str = Query(..., description="Comma-separated list of subreddits"),
-    posts_per_subreddit: int = Query(default=3, ge=1, le=5, description="Posts per subreddit")
+@app.post("/posts/generate-comments", response_model=List[PostWithComments])
+async def generate_comments_for_posts(
+    posts: List[RedditPost],
+    tones: Optional[str] = Query(default=None, description=f"Comma-separated subset of {', '.join(TONES)}"),
+    regenerate: bool = Query(default=False, description="Ignore cached suggestions for the selected tones")
 ):
-    """Fetch posts from multiple subreddits and generate comment suggestions"""
+    """Generate comment suggestions for a list of posts (?tones=humorous&regenerate=true redoes one card)"""
     try:
-        subreddit_list = [s.strip() for s in subreddits.split(",") if s.strip()]
-        
-        if not subreddit_list:
-            raise HTTPException(status_code=400, detail="No valid subreddits provided")
-        
-        if len(subreddit_list) > 10:
-            raise HTTPException(status_code=400, detail="Maximum 10 subreddits allowed")
-        
-        logger.info(f"Fetching posts from subreddits: {subreddit_list}")
+        tone_list = tone_selection(tones)
+        logger.info(f"Generating comments for {len(posts)} posts")
         
-        # Fetch posts from multiple subreddits
-        posts = await asyncio.get_event_loop().run_in_executor(
-            executor, reddit_service.fetch_multiple_subreddits, subreddit_list, posts_per_subreddit
+        # Generate comments for each post concurrently, reusing speculative work
+        posts_with_comments = await generate_posts_with_comments(
+            posts, use_speculation=True, tones=tone_list, refresh=regenerate
         )
         
-        if not posts:
-            raise HTTPException(status_code=404, detail="No posts found in specified subreddits")
-        
-        # Generate comments for each post concurrently
-        tasks = []
-        for post in posts:
-            task = asyncio.get_event_loop().run_in_executor(
-                executor, bedrock_service.generate_comment_suggestions, post
-            )
-            tasks.append(task)
-        
-        # Wait for all comment generation tasks to complete
-        all_suggestions = await asyncio.gather(*tasks)
-        
-        # Combine posts with their comment suggestions
-        posts_with_comments = []
-        for post, suggestions in zip(posts, all_suggestions):
-            posts_with_comments.append(PostWithComments(
-                post=post,
-                comment_suggestions=suggestions
-            ))
-        
-        logger.info(f"Successfully processed {len(posts_with_comments)} posts from multiple subreddits")
-        return posts_with_comments
+        logger.info(f"Successfully generated comments for {len(posts_with_comments)} posts")
+        return FastJSONResponse(posts_with_comments)
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error processing multi-subreddit request: {str(e)}")
+        logger.error(f"Error generating comments: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
-@app.post("/posts/generate-comments")
-async def generate_comments_for_posts(posts: List[RedditPost]):
-    """Generate comment suggestions for a list of posts"""
+def bulk_generator(tones: Optional[List[str]]):
+    """Per-post generation for bulk requests (deduplication needs the whole batch, so it is skipped)"""
+    async def generate(post: RedditPost) -> PostWithComments:
+        generation = await generate_suggestions(post, tones)
+        record_suggestions(post, generation.generated)
+        return PostWithComments(post=post, comment_suggestions=generation.suggestions)
+    return generate
+
+@app.post("/posts/generate-comments/stream")
+async def stream_comments_for_posts(
+    request: Request,
+    tones: Optional[str] = Query(default=None, description=f"Comma-separated subset of {', '.join(TONES)}")
+):
+    """Generate comment suggestions for an NDJSON body of posts, streaming NDJSON results as they finish.
+    
+    Each output line is a PostWithComments, or {"line", "post_id", "error"} for a post that
+    could not be parsed or generated. Results arrive in completion order.
+    """
+    tone_list = tone_selection(tones)
+    body_complete = asyncio.Event()
+    
+    async def body():
+        # Read one chunk ahead so the end of the upload is noticed when it arrives rather than
+        # once every post in it is scheduled; from then on the response listens for a disconnect
+        try:
+            pending = b""
+            async for chunk in request.stream():
+                if not chunk:
+                    continue
+                if pending:
+                    yield pending
+                pending = chunk
+            body_complete.set()
+            if pending:
+                yield pending
+        finally:
+            body_complete.set()
+    
+    items = parse_ndjson(body(), settings.BULK_MAX_LINE_BYTES)
+    
+    async def lines():
+        count = 0
+        async for result in process_bulk(items, bulk_generator(tone_list), settings.BULK_MAX_IN_FLIGHT):
+            count += 1
+            yield to_json(result) + b"\n"
+        logger.info(f"Streamed {count} bulk results")
+    
+    return NDJSONStreamingResponse(lines(), body_complete=body_complete)
+
+@app.post("/posts/generate-comments/jobs", response_model=BulkJob, status_code=202)
+async def start_comments_job(
+    request: Request,
+    tones: Optional[str] = Query(default=None, description=f"Comma-separated subset of {', '.join(TONES)}")
+):
+    """Start generating suggestions for an NDJSON body of posts in the background and return a job id"""
+    tone_list = tone_selection(tones)
+    
+    # The body has to be read before responding; posts are validated line by line as it arrives
+    items = []
+    async for item in parse_ndjson(request.stream(), settings.BULK_MAX_LINE_BYTES):
+        items.append(item)
+        if len(items) > settings.BULK_MAX_JOB_POSTS:
+            raise HTTPException(status_code=413, detail=f"Maximum {settings.BULK_MAX_JOB_POSTS} posts per job")
+    
+    if not items:
+        raise HTTPException(status_code=400, detail="No posts provided")
+    
+    job = bulk_jobs.start(items, len(items), bulk_generator(tone_list), settings.BULK_MAX_IN_FLIGHT)
+    return FastJSONResponse(job, status_code=202)
+
+@app.get("/posts/generate-comments/jobs/{job_id}", response_model=BulkJob)
+async def get_comments_job(
+    job_id: str,
+    offset: int = Query(default=0, ge=0, description="Index of the first result to return"),
+    limit: int = Query(default=100, ge=1, le=1000, description="Results per page")
+):
+    """Job progress plus a page of results in completion order; follow next_offset until it is null"""
+    job = await asyncio.get_event_loop().run_in_executor(executor, bulk_jobs.get, job_id, offset, limit)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown or expired job {job_id}")
+    return FastJSONResponse(job)
+
+@app.websocket("/ws/feed")
+async def feed_websocket(websocket: WebSocket, subreddits: Optional[str] = None):
+    """Live feed of new posts, score changes and suggestions for subscribed subreddits.
+    
+    Subscribe with ?subreddits=a,b and/or by sending
+    {"action": "subscribe" | "unsubscribe", "subreddits": [...]}.
+    """
+    await websocket.accept()
+    subscriber = feed_hub.connect()
+    
+    def update(action: str, names: List[str]):
+        if not isinstance(names, list) or not all(isinstance(name, str) for name in names):
+            raise ValueError("'subreddits' must be a list of subreddit names")
+        names = [name.strip() for name in names if name.strip()]
+        if action == "subscribe":
+            if len(subscriber.subreddits | {name.lower() for name in names}) > settings.FEED_MAX_SUBREDDITS:
+                raise ValueError(f"Maximum {settings.FEED_MAX_SUBREDDITS} subreddits per connection")
+            for name in names:
+                feed_hub.subscribe(subscriber, name)
+        elif action == "unsubscribe":
+            for name in names:
+                feed_hub.unsubscribe(subscriber, name)
+        else:
+            raise ValueError(f"Unknown action '{action}', expected subscribe or unsubscribe")
+    
+    async def receive_commands():
+        try:
+            while True:
+                message = await websocket.receive_json()
+                try:
+                    update(message.get("action"), message.get("subreddits") or [])
+                except (AttributeError, ValueError) as e:
+                    subscriber.deliver(encode_event({"type": "error", "detail": str(e)}))
+        except (WebSocketDisconnect, RuntimeError):
+            pass
+        except Exception as e:
+            logger.warning(f"Invalid feed message: {str(e)}")
+        # Wake the sender so the connection is torn down
+        feed_hub.disconnect(subscriber)
+        subscriber.close()
+    
+    receiver = None
     try:
-        logger.info(f"Generating comments for {len(posts)} posts")
-        
-        # Generate comments for each post concurrently
-        tasks = []
-        for post in posts:
-            task = asyncio.get_event_loop().run_in_executor(
-                executor, bedrock_service.generate_comment_suggestions, post
-            )
-            tasks.append(task)
+        if subreddits:
+            update("subscribe", subreddits.split(","))
+        receiver = asyncio.get_event_loop().create_task(receive_commands())
         
-        # Wait for all comment generation tasks to complete
-        all_suggestions = await asyncio.gather(*tasks)
+        while True:
+            message = await subscriber.queue.get()
+            if message is None:
+                break
+            await websocket.send_text(message)
         
-        # Combine posts with their comment suggestions
-        posts_with_comments = []
-        for post, suggestions in zip(posts, all_suggestions):
-            posts_with_comments.append(PostWithComments(
-                post=post,
-                comment_suggestions=suggestions
-            ))
-        
-        logger.info(f"Successfully generated comments for {len(posts_with_comments)} posts")
-        return posts_with_comments
-        
-    except Exception as e:
-        logger.error(f"Error generating comments: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+    except ValueError as e:
+        await websocket.send_json({"type": "error", "detail": str(e)})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        if receiver is not None:
+            receiver.cancel()
+        feed_hub.disconnect(subscriber)
+    
+    try:
+        await websocket.close()
+    except RuntimeError:
+        pass  # Already closed by the client
 
 if __name__ == "__main__":
     import uvicorn
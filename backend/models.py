@@ -24,6 +24,25 @@ class PostWithComments(BaseModel):
     post: RedditPost
     comment_suggestions: List[CommentSuggestion]
 
+class HistoryPage(BaseModel):
+    items: List[PostWithComments]
+    next_cursor: Optional[str] = None
+
+class BulkItemError(BaseModel):
+    line: Optional[int] = None
+    post_id: Optional[str] = None
+    error: str
+
+class BulkJob(BaseModel):
+    job_id: str
+    status: str  # running, done, failed or cancelled
+    total: int
+    completed: int = 0
+    failed: int = 0
+    results: List[PostWithComments] = []
+    errors: List[BulkItemError] = []
+    next_offset: Optional[int] = None
+
 class ErrorResponse(BaseModel):
     error: str
     message: str
\ No newline at end of file
@@ -0,0 +1,148 @@
+import heapq
+import time
+import logging
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class Candidate(NamedTuple):
+    """The fields ranking needs, read without building a RedditPost"""
+    subreddit: str
+    score: int
+    num_comments: int
+    created_utc: float
+    item: Any
+
+    @classmethod
+    def from_post(cls, post) -> "Candidate":
+        created = post.created_utc.timestamp() if isinstance(post.created_utc, datetime) else post.created_utc
+        return cls(post.subreddit, post.score, post.num_comments, created, post)
+
+
+def _age_hours(candidate: Candidate, now: float) -> float:
+    return max(0.0, now - candidate.created_utc) / 3600
+
+
+def score_raw(candidate: Candidate, now: float, gravity: float) -> float:
+    return float(candidate.score)
+
+
+def score_velocity(candidate: Candidate, now: float, gravity: float) -> float:
+    """Upvotes per hour with Hacker News style decay, so fresh posts can beat old ones"""
+    return candidate.score / (_age_hours(candidate, now) + 2) ** gravity
+
+
+def score_comment_velocity(candidate: Candidate, now: float, gravity: float) -> float:
+    return candidate.num_comments / (_age_hours(candidate, now) + 2) ** gravity
+
+
+SCORERS: Dict[str, Callable[[Candidate, float, float], float]] = {
+    "score": score_raw,
+    "velocity": score_velocity,
+    "comment_velocity": score_comment_velocity,
+}
+
+
+class Ranker:
+    """Scores candidates with a named scorer, optionally normalized per subreddit.
+
+    Normalization divides by the highest score among each subreddit's
+    candidates, so small subreddits compete on equal terms with large ones.
+    """
+
+    def __init__(self, scorer: str = "velocity", normalize: bool = False, gravity: float = 1.5):
+        if scorer not in SCORERS:
+            raise ValueError(f"Unknown ranking scorer '{scorer}', expected one of {', '.join(SCORERS)}")
+        self.name = scorer
+        self.scorer = SCORERS[scorer]
+        self.normalize = normalize
+        self.gravity = gravity
+        self.now = time.time()
+
+    def score(self, candidate: Candidate) -> float:
+        return self.scorer(candidate, self.now, self.gravity)
+
+    def score_all(self, candidates: List[Candidate]) -> List[Tuple[float, Candidate]]:
+        """Score a complete set of candidates, normalizing per subreddit if enabled"""
+        scored = [(self.score(candidate), candidate) for candidate in candidates]
+        if not self.normalize:
+            return scored
+
+        maxima: Dict[str, float] = {}
+        for value, candidate in scored:
+            key = candidate.subreddit.lower()
+            maxima[key] = max(maxima.get(key, value), value)
+
+        normalized = []
+        for value, candidate in scored:
+            # A subreddit whose best score is zero has nothing to scale by; its posts stay at zero
+            maximum = maxima[candidate.subreddit.lower()]
+            normalized.append((value / maximum if maximum > 0 else 0.0, candidate))
+        return normalized
+
+
+class TopK:
+    """Bounded min-heap keeping the k highest-scoring items seen so far"""
+
+    def __init__(self, k: int):
+        self.k = k
+        self._heap: List[Tuple[float, int, Any]] = []
+        self._seq = 0
+
+    @property
+    def full(self) -> bool:
+        return len(self._heap) >= self.k
+
+    @property
+    def threshold(self) -> float:
+        """Score an item must beat to enter a full heap"""
+        return self._heap[0][0] if self.full else float("-inf")
+
+    def push(self, score: float, item: Any) -> bool:
+        """Offer an item, returning whether it is (for now) in the top k"""
+        # The sequence number keeps ties stable and avoids comparing items
+        entry = (score, -self._seq, item)
+        self._seq += 1
+        if not self.full:
+            heapq.heappush(self._heap, entry)
+            return True
+        if score <= self._heap[0][0]:
+            return False
+        heapq.heapreplace(self._heap, entry)
+        return True
+
+    def ranked(self) -> List[Tuple[float, Any]]:
+        """Items from best to worst"""
+        return [(score, item) for score, _, item in sorted(self._heap, reverse=True)]
+
+
+def rank_streams(
+    sources: Dict[str, Iterator[Candidate]],
+    k: int,
+    ranker: Ranker,
+    per_source_limit: Optional[int] = None
+) -> List[Candidate]:
+    """Merge candidate streams into the top k by the ranker's score.
+
+    Every candidate is scored; hot order does not follow any scorer's order,
+    so stopping a source early could miss its best candidate. Candidates are
+    collected before scoring, since normalization needs each subreddit's maximum.
+    """
+    candidates: List[Candidate] = []
+    for name, stream in sources.items():
+        try:
+            for taken, candidate in enumerate(stream, 1):
+                candidates.append(candidate)
+                if per_source_limit is not None and taken >= per_source_limit:
+                    break
+        except Exception as e:
+            logger.warning(f"Failed to fetch from r/{name}: {str(e)}")
+
+    top = TopK(k)
+    for score, candidate in ranker.score_all(candidates):
+        top.push(score, candidate)
+
+    logger.info(f"Ranked {len(candidates)} candidates by {ranker.name}, keeping {min(k, len(candidates))}")
+    return [candidate for _, candidate in top.ranked()]
@@ -0,0 +1,312 @@
+"""
+Record/replay of upstream Reddit and Bedrock traffic.
+
+In record mode the real clients are wrapped so every hot listing and every
+Bedrock response (including errors) is appended to a cassette: a
+gzip-compressed JSON-lines file. In replay mode the cassette stands in for
+both clients, serving the same payloads back with their original timings
+(scaled by REPLAY_SPEED) and without importing praw or boto3.
+"""
+
+import os
+import re
+import glob
+import gzip
+import zlib
+import json
+import time
+import hashlib
+import logging
+import threading
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Submission attributes RedditService reads
+SUBMISSION_FIELDS = [
+    "id", "title", "selftext", "url", "score", "num_comments",
+    "created_utc", "permalink", "thumbnail", "stickied",
+]
+
+
+def _split_extension(path: str):
+    """'cassettes/prod.jsonl.gz' -> ('cassettes/prod', '.jsonl.gz')"""
+    directory, name = os.path.split(path)
+    stem, dot, extension = name.partition(".")
+    return os.path.join(directory, stem), dot + extension
+
+
+class Cassette:
+    """Append-only store of recorded upstream interactions.
+
+    Each recording process writes its own segment next to ``path``
+    (``prod.<started>-<pid>.jsonl.gz`` for ``prod.jsonl.gz``), so several
+    workers never interleave gzip members and a new run never appends to a
+    file that a killed run left without its gzip trailer. Loading reads
+    ``path`` and all of its segments, keeping every complete line in front of
+    a truncated tail.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = None
+        self.segment_path: Optional[str] = None
+        self._records: Optional[Dict[str, List[dict]]] = None
+        self._cursors: Dict[str, int] = {}
+
+    def record(self, kind: str, key: str, elapsed: float, data: Any = None, error: Optional[str] = None):
+        entry = {"kind": kind, "key": key, "elapsed": round(elapsed, 4)}
+        if error is not None:
+            entry["error"] = error
+        else:
+            entry["data"] = data
+        line = json.dumps(entry, separators=(",", ":")) + "\n"
+
+        with self._lock:
+            if self._file is None:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                stem, extension = _split_extension(self.path)
+                self.segment_path = f"{stem}.{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}{extension}"
+                self._file = gzip.open(self.segment_path, "at", encoding="utf-8")
+            self._file.write(line)
+            # A sync flush ends the deflate block, so a hard kill loses at most the trailer
+            self._file.flush()
+
+    def paths(self) -> List[str]:
+        """The cassette file, if any, followed by its segments in recording order"""
+        stem, extension = _split_extension(self.path)
+        pattern = re.compile(re.escape(stem) + r"\.\d{8}T\d{6}-\d+" + re.escape(extension) + "$")
+        segments = sorted(p for p in glob.glob(glob.escape(stem) + ".*" + extension) if pattern.match(p))
+        return ([self.path] if os.path.exists(self.path) else []) + segments
+
+    @staticmethod
+    def _read(path: str) -> Iterator[dict]:
+        try:
+            with gzip.open(path, "rb") as f:
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break  # Cut off mid-write
+                    if line.strip():
+                        yield json.loads(line)
+        except (EOFError, zlib.error, gzip.BadGzipFile) as e:
+            # Left by a recorder that was killed; everything before this point is intact
+            logger.warning(f"Ignoring truncated end of cassette {path}: {str(e)}")
+
+    def load(self) -> Dict[str, List[dict]]:
+        with self._lock:
+            if self._records is None:
+                paths = self.paths()
+                if not paths:
+                    raise FileNotFoundError(f"No cassette found at {self.path}")
+
+                records: Dict[str, List[dict]] = {}
+                for path in paths:
+                    for entry in self._read(path):
+                        records.setdefault(f"{entry['kind']}:{entry['key']}", []).append(entry)
+                self._records = records
+                logger.info(f"Loaded {sum(len(v) for v in records.values())} recorded interactions from {self.path}")
+            return self._records
+
+    def next(self, kind: str, key: str) -> dict:
+        """Return the next recording for a key, cycling when a key was recorded several times"""
+        records = self.load().get(f"{kind}:{key}")
+        if not records:
+            raise LookupError(f"No recorded {kind} interaction for {key} in {self.path}")
+
+        with self._lock:
+            cursor = self._cursors.get(f"{kind}:{key}", 0)
+            self._cursors[f"{kind}:{key}"] = cursor + 1
+        return records[cursor % len(records)]
+
+    def entries(self, kind: Optional[str] = None) -> Iterator[dict]:
+        for records in self.load().values():
+            for entry in records:
+                if kind is None or entry["kind"] == kind:
+                    yield entry
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def _replay_delay(elapsed: float):
+    if settings.REPLAY_SPEED > 0:
+        time.sleep(elapsed / settings.REPLAY_SPEED)
+
+
+def _listing_key(subreddit_name: str, limit: int) -> str:
+    return f"{subreddit_name.lower()}:hot:{limit}"
+
+
+def _submission_to_dict(submission) -> dict:
+    data = {field: getattr(submission, field, None) for field in SUBMISSION_FIELDS}
+    data["author"] = str(submission.author) if submission.author else None
+    data["subreddit"] = submission.subreddit.display_name
+    return data
+
+
+def _dict_to_submission(data: dict) -> SimpleNamespace:
+    fields = dict(data)
+    fields["subreddit"] = SimpleNamespace(display_name=data["subreddit"])
+    return SimpleNamespace(**fields)
+
+
+class RecordingSubreddit:
+    def __init__(self, subreddit, cassette: Cassette):
+        self._subreddit = subreddit
+        self._cassette = cassette
+
+    def __getattr__(self, name):
+        return getattr(self._subreddit, name)
+
+    def hot(self, limit: int = 10) -> Iterator[SimpleNamespace]:
+        key = _listing_key(self._subreddit.display_name, limit)
+        start = time.perf_counter()
+        try:
+            # Materialize the whole listing so the recording is complete even
+            # if the caller stops iterating early
+            submissions = [_submission_to_dict(s) for s in self._subreddit.hot(limit=limit)]
+        except Exception as e:
+            self._cassette.record("reddit", key, time.perf_counter() - start, error=str(e))
+            raise
+        self._cassette.record("reddit", key, time.perf_counter() - start, data=submissions)
+        return iter([_dict_to_submission(s) for s in submissions])
+
+
+class RecordingReddit:
+    """Wraps a praw.Reddit instance and records every hot listing"""
+
+    def __init__(self, reddit, cassette: Cassette):
+        self._reddit = reddit
+        self._cassette = cassette
+
+    def __getattr__(self, name):
+        return getattr(self._reddit, name)
+
+    def subreddit(self, name: str) -> RecordingSubreddit:
+        return RecordingSubreddit(self._reddit.subreddit(name), self._cassette)
+
+
+class ReplaySubreddit:
+    def __init__(self, name: str, cassette: Cassette):
+        self.display_name = name
+        self._cassette = cassette
+
+    def hot(self, limit: int = 10) -> Iterator[SimpleNamespace]:
+        entry = self._cassette.next("reddit", _listing_key(self.display_name, limit))
+        _replay_delay(entry["elapsed"])
+        if "error" in entry:
+            raise Exception(entry["error"])
+        return iter([_dict_to_submission(s) for s in entry["data"]])
+
+
+class ReplayReddit:
+    """Serves recorded hot listings in place of praw.Reddit"""
+
+    def __init__(self, cassette: Cassette):
+        self._cassette = cassette
+
+    def subreddit(self, name: str) -> ReplaySubreddit:
+        return ReplaySubreddit(name, self._cassette)
+
+
+class ResponseBody:
+    """Re-readable stand-in for the streaming body of an invoke_model response"""
+
+    def __init__(self, data: bytes):
+        self._data = data
+
+    def read(self) -> bytes:
+        return self._data
+
+
+def _invoke_key(modelId: str, body: str) -> str:
+    return hashlib.sha256(f"{modelId}\0{body}".encode("utf-8")).hexdigest()[:32]
+
+
+class RecordingBedrockClient:
+    """Wraps a bedrock-runtime client and records every invoke_model response"""
+
+    def __init__(self, client, cassette: Cassette):
+        self._client = client
+        self._cassette = cassette
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+    def invoke_model(self, modelId: str, body: str, **kwargs):
+        key = _invoke_key(modelId, body)
+        start = time.perf_counter()
+        try:
+            response = self._client.invoke_model(modelId=modelId, body=body, **kwargs)
+            data = response["body"].read()
+        except Exception as e:
+            self._cassette.record("bedrock", key, time.perf_counter() - start, error=str(e))
+            raise
+        self._cassette.record("bedrock", key, time.perf_counter() - start, data=data.decode("utf-8"))
+        # The streaming body was consumed above, so hand back a re-readable copy
+        return {**response, "body": ResponseBody(data)}
+
+
+class ReplayBedrockClient:
+    """Serves recorded invoke_model responses in place of the boto3 client"""
+
+    def __init__(self, cassette: Cassette):
+        self._cassette = cassette
+
+    def invoke_model(self, modelId: str, body: str, **kwargs):
+        entry = self._cassette.next("bedrock", _invoke_key(modelId, body))
+        _replay_delay(entry["elapsed"])
+        if "error" in entry:
+            raise Exception(entry["error"])
+        return {"body": ResponseBody(entry["data"].encode("utf-8"))}
+
+
+_cassette: Optional[Cassette] = None
+_cassette_lock = threading.Lock()
+
+
+def get_cassette() -> Cassette:
+    """Cassette at CASSETTE_PATH, shared by the Reddit and Bedrock wrappers"""
+    global _cassette
+    with _cassette_lock:
+        if _cassette is None:
+            _cassette = Cassette(settings.CASSETTE_PATH)
+        return _cassette
+
+
+def close_cassette():
+    """Write out the gzip trailer of the cassette being recorded, if any"""
+    with _cassette_lock:
+        if _cassette is not None:
+            _cassette.close()
+
+
+def build_reddit_client(factory: Callable[[], Any]) -> Any:
+    """Create the Reddit client for the configured UPSTREAM_MODE"""
+    mode = settings.UPSTREAM_MODE
+    if mode == "replay":
+        logger.info(f"Replaying Reddit listings from {settings.CASSETTE_PATH}")
+        return ReplayReddit(get_cassette())
+    if mode == "record":
+        logger.info(f"Recording Reddit listings to {settings.CASSETTE_PATH}")
+        return RecordingReddit(factory(), get_cassette())
+    return factory()
+
+
+def build_bedrock_client(factory: Callable[[], Any]) -> Any:
+    """Create the Bedrock client for the configured UPSTREAM_MODE"""
+    mode = settings.UPSTREAM_MODE
+    if mode == "replay":
+        logger.info(f"Replaying Bedrock responses from {settings.CASSETTE_PATH}")
+        return ReplayBedrockClient(get_cassette())
+    if mode == "record":
+        logger.info(f"Recording Bedrock responses to {settings.CASSETTE_PATH}")
+        return RecordingBedrockClient(factory(), get_cassette())
+    return factory()
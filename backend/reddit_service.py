@@ -1,21 +1,95 @@
-import praw
-from typing import List
+import threading
+from contextlib import nullcontext
+from typing import Any, Iterator, List, Optional
 from datetime import datetime
+from pydantic import TypeAdapter
 from config import settings
 from models import RedditPost
+from cache import CacheBackend, MemoryCache
+from recorder import build_reddit_client
+from ranking import Candidate, Ranker, rank_streams
+from store import PostStore
 import logging
 
 logger = logging.getLogger(__name__)
 
+_posts_adapter = TypeAdapter(List[RedditPost])
+
 class RedditService:
-    def __init__(self):
-        self.reddit = praw.Reddit(
+    def __init__(
+        self,
+        cache: Optional[CacheBackend] = None,
+        reddit: Optional[Any] = None,
+        store: Optional[PostStore] = None
+    ):
+        # The PRAW client is built on first use so importing the app stays cheap
+        self._reddit = reddit
+        self._reddit_lock = threading.Lock()
+        self.cache = cache if cache is not None else MemoryCache()
+        self.store = store
+    
+    @property
+    def is_initialized(self) -> bool:
+        return self._reddit is not None
+    
+    @property
+    def reddit(self):
+        """PRAW client, created lazily and at most once across threads"""
+        if self._reddit is None:
+            with self._reddit_lock:
+                if self._reddit is None:
+                    self._reddit = build_reddit_client(self._create_client)
+        return self._reddit
+    
+    def _create_client(self):
+        import praw
+        
+        reddit = praw.Reddit(
             client_id=settings.REDDIT_CLIENT_ID,
             client_secret=settings.REDDIT_CLIENT_SECRET,
             user_agent=settings.REDDIT_USER_AGENT
         )
+        logger.info("Reddit client initialized successfully")
+        return reddit
+    
+    @staticmethod
+    def _listing_key(subreddit_name: str, limit: int) -> str:
+        return f"listing:{subreddit_name.lower()}:{limit}"
+    
+    def listing_ttl_remaining(self, subreddit_name: str, limit: int) -> int:
+        """Seconds until the cached listing for a subreddit expires"""
+        entry = self.cache.get(self._listing_key(subreddit_name, limit))
+        if entry is None:
+            return settings.LISTING_CACHE_TTL
+        return max(0, int(settings.LISTING_CACHE_TTL - entry.age))
     
     def fetch_hot_posts(self, subreddit_name: str, limit: int = 3) -> List[RedditPost]:
+        """Fetch hot posts from a specific subreddit, served from the listing cache when fresh"""
+        cache_key = self._listing_key(subreddit_name, limit)
+        entry = self.cache.get(cache_key)
+        if entry is not None:
+            logger.debug(f"Listing cache hit for r/{subreddit_name}")
+            return _posts_adapter.validate_json(entry.value)
+        
+        # Single-flight: only one worker fetches a listing, the rest wait for its result.
+        # With caching disabled a waiter would find nothing and fetch anyway, so skip the lock.
+        if settings.LISTING_CACHE_TTL > 0:
+            lock = self.cache.lock(cache_key, ttl=30.0, wait=30.0)
+        else:
+            lock = nullcontext()
+        with lock:
+            entry = self.cache.get(cache_key)
+            if entry is not None:
+                return _posts_adapter.validate_json(entry.value)
+            
+            posts = self._fetch_hot_posts_uncached(subreddit_name, limit)
+            if posts:
+                self.cache.set(cache_key, _posts_adapter.dump_json(posts), settings.LISTING_CACHE_TTL)
+                if self.store is not None:
+                    self.store.save_posts(posts)
+            return posts
+    
+    def _fetch_hot_posts_uncached(self, subreddit_name: str, limit: int) -> List[RedditPost]:
         """Fetch hot posts from a specific subreddit"""
         try:
             subreddit = self.reddit.subreddit(subreddit_name)
@@ -58,18 +132,22 @@ class RedditService:
             logger.error(f"Error fetching posts from r/{subreddit_name}: {str(e)}")
             raise Exception(f"Failed to fetch posts from r/{subreddit_name}: {str(e)}")
     
-    def fetch_multiple_subreddits(self, subreddits: List[str], posts_per_subreddit: int = 3) -> List[RedditPost]:
-        """Fetch posts from multiple subreddits"""
-        all_posts = []
-        
-        for subreddit_name in subreddits:
-            try:
-                posts = self.fetch_hot_posts(subreddit_name, posts_per_subreddit)
-                all_posts.extend(posts)
-            except Exception as e:
-                logger.warning(f"Failed to fetch from r/{subreddit_name}: {str(e)}")
-                continue
+    def _iter_candidates(self, subreddit_name: str, limit: int) -> Iterator[Candidate]:
+        """Ranking candidates for a subreddit; the listing is only fetched once the ranker pulls from it"""
+        for post in self.fetch_hot_posts(subreddit_name, limit):
+            yield Candidate.from_post(post)
+    
+    def fetch_multiple_subreddits(
+        self,
+        subreddits: List[str],
+        posts_per_subreddit: int = 3,
+        top_k: int = 10,
+        ranker: Optional[Ranker] = None
+    ) -> List[RedditPost]:
+        """Fetch the top posts across multiple subreddits, best first"""
+        if ranker is None:
+            ranker = Ranker(settings.RANKING_SCORER, settings.RANKING_NORMALIZE, settings.RANKING_GRAVITY)
         
-        # Sort by score (popularity) and return top 10
-        all_posts.sort(key=lambda x: x.score, reverse=True)
-        return all_posts[:10]
\ No newline at end of file
+        sources = {name: self._iter_candidates(name, posts_per_subreddit) for name in subreddits}
+        survivors = rank_streams(sources, top_k, ranker, per_source_limit=posts_per_subreddit)
+        return [candidate.item for candidate in survivors]
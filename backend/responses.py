@@ -0,0 +1,116 @@
+import asyncio
+import hashlib
+from functools import partial
+from typing import Any, Optional
+
+import anyio
+from fastapi import Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic_core import to_json
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered by pydantic-core's Rust serializer.
+
+    Accepts pydantic models (or lists of them) directly, so endpoints can
+    return already-built models without FastAPI dumping them to dicts and
+    re-validating them against ``response_model``.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return to_json(content)
+
+
+def make_etag(*parts: bytes) -> str:
+    """Weak ETag over the given parts.
+
+    Weak because the compression middleware sends identity, gzip and br
+    bodies under the same validator, which a strong ETag must not do.
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part)
+        digest.update(b"\0")
+    return f'W/"{digest.hexdigest()[:32]}"'
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """Check an If-None-Match header value against an ETag (weak comparison)"""
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return any(tag.removeprefix("W/") == opaque for tag in candidates)
+
+
+def _cache_headers(etag: str, max_age: int) -> dict:
+    return {
+        "ETag": etag,
+        "Cache-Control": f"private, max-age={max(0, max_age)}, must-revalidate",
+    }
+
+
+def not_modified_response(request: Request, etag: Optional[str], max_age: int) -> Optional[Response]:
+    """A 304 if the client already holds ``etag``, checked before any body is built"""
+    if_none_match = request.headers.get("if-none-match")
+    if etag is None or not if_none_match or not _etag_matches(if_none_match, etag):
+        return None
+    return Response(status_code=304, headers=_cache_headers(etag, max_age))
+
+
+def conditional_json_response(request: Request, content: Any, max_age: int, etag: Optional[str] = None) -> Response:
+    """Render content with an ETag, answering 304 when the client's copy is current.
+
+    ``etag`` should be derived from the inputs of the response (see
+    ``not_modified_response``); without one it is a hash of the body.
+    ``max_age`` should be the time left before the underlying listing cache
+    expires, so clients stop revalidating a body that cannot have changed.
+    """
+    response = FastJSONResponse(content)
+    if etag is None:
+        etag = make_etag(response.body)
+
+    not_modified = not_modified_response(request, etag, max_age)
+    if not_modified is not None:
+        return not_modified
+
+    response.headers.update(_cache_headers(etag, max_age))
+    return response
+
+
+class NDJSONStreamingResponse(StreamingResponse):
+    """Newline-delimited JSON streamed as it is produced.
+
+    Starlette's StreamingResponse listens for client disconnects by reading
+    ``receive`` in parallel, which would swallow request body chunks. This
+    variant leaves ``receive`` to the endpoint so it can keep reading an
+    NDJSON upload while results stream back, and only starts listening once
+    ``body_complete`` is set; a disconnect after that cancels the stream.
+    """
+
+    media_type = "application/x-ndjson"
+
+    def __init__(
+        self, content, status_code: int = 200, headers=None, body_complete: Optional[asyncio.Event] = None
+    ):
+        # "identity" keeps the compression middleware from buffering lines
+        super().__init__(content, status_code, {"Content-Encoding": "identity", **(headers or {})})
+        self.body_complete = body_complete
+
+    async def __call__(self, scope, receive, send):
+        if self.body_complete is None:
+            await self.stream_response(send)
+            return
+
+        async with anyio.create_task_group() as task_group:
+
+            async def wrap(func):
+                await func()
+                task_group.cancel_scope.cancel()
+
+            async def listen_after_body():
+                await self.body_complete.wait()
+                await self.listen_for_disconnect(receive)
+
+            task_group.start_soon(wrap, partial(self.stream_response, send))
+            await wrap(listen_after_body)
@@ -0,0 +1,154 @@
+import time
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from bedrock_service import Generation, post_fingerprint
+from models import RedditPost
+
+logger = logging.getLogger(__name__)
+
+
+class _Speculation:
+    __slots__ = ("future", "created_at", "generated")
+
+    def __init__(self):
+        self.future: Optional[Future] = None
+        self.created_at = time.monotonic()
+        # Set by the worker once Bedrock was actually called (not a cache hit)
+        self.generated = False
+
+
+class SpeculativeGenerator:
+    """Starts suggestion generation for posts a client is likely to ask about next.
+
+    Work runs on its own small thread pool so it never takes executor threads
+    from foreground requests. At most ``max_pending`` generations are queued or
+    running; anything beyond that is dropped. Results not claimed within ``ttl``
+    seconds are discarded, cancelling the generation if it has not started yet.
+    Finished generations still land in the suggestion cache, so late requests
+    benefit even after expiry.
+
+    A claim only counts towards hits and misses when speculation was attempted
+    for the post (scheduled, dropped or expired) or the caller says it should
+    have been, so lookups with speculation off don't drag the hit rate down.
+    """
+
+    # How many unclaimed speculated keys are remembered for miss accounting
+    max_remembered = 4096
+
+    def __init__(self, bedrock_service, max_workers: int = 2, max_pending: int = 50, ttl: float = 60.0):
+        self.bedrock_service = bedrock_service
+        self.max_pending = max_pending
+        self.ttl = ttl
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="speculative")
+        self._lock = threading.Lock()
+        self._entries: Dict[str, _Speculation] = {}
+        self._attempted: "OrderedDict[str, None]" = OrderedDict()
+
+        self.scheduled = 0
+        self.hits = 0
+        self.misses = 0
+        self.wasted = 0
+        self.cancelled = 0
+        self.dropped = 0
+
+    @staticmethod
+    def _key(post: RedditPost) -> str:
+        # Same fingerprint as the suggestion cache, so a claim matches the generation it started
+        return f"{post.id}:{post_fingerprint(post)}"
+
+    def schedule(self, posts: List[RedditPost]) -> int:
+        """Queue generation for posts not already speculated on, returning how many were queued"""
+        queued = 0
+        with self._lock:
+            self._expire()
+            for post in posts:
+                key = self._key(post)
+                if key in self._entries:
+                    continue
+                self._remember(key)
+                pending = sum(1 for entry in self._entries.values() if not entry.future.done())
+                if pending >= self.max_pending:
+                    self.dropped += 1
+                    continue
+
+                entry = _Speculation()
+                entry.future = self._executor.submit(self._run, post, entry)
+                self._entries[key] = entry
+                self.scheduled += 1
+                queued += 1
+
+        if queued:
+            logger.debug(f"Speculatively generating suggestions for {queued} posts")
+        return queued
+
+    def _run(self, post: RedditPost, entry: _Speculation) -> Generation:
+        cached = self.bedrock_service.get_cached_suggestions(post)
+        if cached is not None:
+            return Generation(suggestions=cached, generated=[])
+        entry.generated = True
+        return self.bedrock_service.generate(post)
+
+    def claim(self, post: RedditPost, expected: bool = False) -> Optional[Future]:
+        """Take over the speculative generation for a post, if there is one.
+
+        ``expected`` counts a miss even if nothing was ever scheduled for the
+        post, i.e. when speculation is enabled and should have covered it.
+        """
+        with self._lock:
+            self._expire()
+            key = self._key(post)
+            entry = self._entries.pop(key, None)
+            attempted = key in self._attempted
+            self._attempted.pop(key, None)
+            if entry is None:
+                if attempted or expected:
+                    self.misses += 1
+                return None
+            self.hits += 1
+            return entry.future
+
+    def _remember(self, key: str):
+        # Caller holds self._lock
+        self._attempted[key] = None
+        self._attempted.move_to_end(key)
+        while len(self._attempted) > self.max_remembered:
+            self._attempted.popitem(last=False)
+
+    def _expire(self):
+        # Caller holds self._lock
+        now = time.monotonic()
+        for key in [k for k, e in self._entries.items() if now - e.created_at > self.ttl]:
+            self._discard(self._entries.pop(key))
+
+    def _discard(self, entry: _Speculation):
+        if entry.future.cancel():
+            self.cancelled += 1
+        elif entry.generated:
+            # Running or finished without anyone asking for it
+            self.wasted += 1
+
+    def cancel_all(self):
+        """Drop every unclaimed speculation, cancelling those not yet started"""
+        with self._lock:
+            for entry in self._entries.values():
+                self._discard(entry)
+            self._entries.clear()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            self._expire()
+            lookups = self.hits + self.misses
+            return {
+                "scheduled": self.scheduled,
+                "pending": sum(1 for entry in self._entries.values() if not entry.future.done()),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "wasted": self.wasted,
+                "cancelled": self.cancelled,
+                "dropped": self.dropped,
+            }
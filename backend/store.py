@@ -0,0 +1,311 @@
+import os
+import time
+import queue
+import sqlite3
+import logging
+import threading
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from cache import SQLiteConnections
+from models import CommentSuggestion, PostWithComments, RedditPost
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS posts (
+    id TEXT PRIMARY KEY,
+    subreddit TEXT NOT NULL,
+    subreddit_key TEXT NOT NULL,
+    title TEXT NOT NULL,
+    content TEXT NOT NULL,
+    author TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    num_comments INTEGER NOT NULL,
+    created_utc REAL NOT NULL,
+    url TEXT NOT NULL,
+    permalink TEXT NOT NULL,
+    thumbnail TEXT,
+    stored_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_posts_subreddit_created ON posts (subreddit_key, created_utc DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_posts_created ON posts (created_utc DESC, id DESC);
+
+CREATE TABLE IF NOT EXISTS suggestions (
+    id INTEGER PRIMARY KEY,
+    post_id TEXT NOT NULL,
+    model_id TEXT NOT NULL,
+    tone TEXT NOT NULL,
+    comment TEXT NOT NULL,
+    reasoning TEXT NOT NULL,
+    generated_at REAL NOT NULL,
+    UNIQUE (post_id, model_id, tone, comment)
+);
+CREATE INDEX IF NOT EXISTS idx_suggestions_model ON suggestions (model_id, generated_at DESC);
+"""
+
+# Full-text index over titles and bodies, kept in sync by triggers
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS posts_fts USING fts5(
+    title, content, content='posts', content_rowid='rowid'
+);
+CREATE TRIGGER IF NOT EXISTS posts_fts_insert AFTER INSERT ON posts BEGIN
+    INSERT INTO posts_fts (rowid, title, content) VALUES (new.rowid, new.title, new.content);
+END;
+CREATE TRIGGER IF NOT EXISTS posts_fts_delete AFTER DELETE ON posts BEGIN
+    INSERT INTO posts_fts (posts_fts, rowid, title, content) VALUES ('delete', old.rowid, old.title, old.content);
+END;
+CREATE TRIGGER IF NOT EXISTS posts_fts_update AFTER UPDATE OF title, content ON posts BEGIN
+    INSERT INTO posts_fts (posts_fts, rowid, title, content) VALUES ('delete', old.rowid, old.title, old.content);
+    INSERT INTO posts_fts (rowid, title, content) VALUES (new.rowid, new.title, new.content);
+END;
+"""
+
+UPSERT_POST = """
+INSERT INTO posts (id, subreddit, subreddit_key, title, content, author, score, num_comments,
+                   created_utc, url, permalink, thumbnail, stored_at)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (id) DO UPDATE SET
+    title = excluded.title, content = excluded.content, score = excluded.score,
+    num_comments = excluded.num_comments, thumbnail = excluded.thumbnail, stored_at = excluded.stored_at
+"""
+
+# Posts that arrive with suggestions may come from request bodies, so they never
+# overwrite a stored post; only listings fetched from Reddit update existing rows
+INSERT_POST_IF_ABSENT = """
+INSERT OR IGNORE INTO posts (id, subreddit, subreddit_key, title, content, author, score, num_comments,
+                             created_utc, url, permalink, thumbnail, stored_at)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+INSERT_SUGGESTION = """
+INSERT OR IGNORE INTO suggestions (post_id, model_id, tone, comment, reasoning, generated_at)
+VALUES (?, ?, ?, ?, ?, ?)
+"""
+
+
+def encode_cursor(created_utc: float, post_id: str) -> str:
+    return f"{created_utc!r}:{post_id}"
+
+
+def decode_cursor(cursor: str) -> Tuple[float, str]:
+    created_utc, _, post_id = cursor.partition(":")
+    try:
+        return float(created_utc), post_id
+    except ValueError:
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+
+class PostStore:
+    """SQLite (WAL) store of fetched posts and generated suggestions.
+
+    Writes are queued and applied in batches by a background thread so the
+    request path never waits on disk; reads use per-thread connections.
+    """
+
+    def __init__(self, path: str, batch_size: int = 200, flush_interval: float = 1.0, max_queue: int = 10000):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._connections = SQLiteConnections(path, row_factory=sqlite3.Row)
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue)
+        self._writer: Optional[threading.Thread] = None
+        self._writer_lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = self._connection()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(SCHEMA)
+        try:
+            conn.executescript(FTS_SCHEMA)
+            self.full_text = True
+        except sqlite3.OperationalError:
+            logger.warning("SQLite was built without FTS5, history search falls back to LIKE")
+            self.full_text = False
+
+    def _connection(self) -> sqlite3.Connection:
+        return self._connections.get()
+
+    # Writes
+
+    def save_posts(self, posts: List[RedditPost]):
+        """Queue posts for storage without blocking"""
+        if posts:
+            self._enqueue(("posts", posts, None, None))
+
+    def save_suggestions(self, post: RedditPost, suggestions: List[CommentSuggestion], model_id: str):
+        """Queue suggestions for a post without blocking; the post is only added if not already stored"""
+        self._enqueue(("suggestions", [post], suggestions, model_id))
+
+    def _enqueue(self, item):
+        self._ensure_writer()
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            logger.warning("History store write queue is full, dropping write")
+
+    def _ensure_writer(self):
+        if self._writer is None:
+            with self._writer_lock:
+                if self._writer is None:
+                    self._writer = threading.Thread(target=self._write_loop, name="post-store-writer", daemon=True)
+                    self._writer.start()
+
+    def _write_loop(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+
+            batch = [item]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._write_batch(batch)
+                    return
+                batch.append(item)
+
+            self._write_batch(batch)
+
+    def _write_batch(self, batch):
+        now = time.time()
+        fetched_rows = {}
+        submitted_rows = {}
+        suggestion_rows = []
+        for kind, posts, suggestions, model_id in batch:
+            rows = fetched_rows if kind == "posts" else submitted_rows
+            for post in posts:
+                rows[post.id] = (
+                    post.id, post.subreddit, post.subreddit.lower(), post.title, post.content, post.author,
+                    post.score, post.num_comments, post.created_utc.timestamp(), post.url, post.permalink,
+                    post.thumbnail, now
+                )
+            if kind == "suggestions":
+                suggestion_rows.extend(
+                    (posts[0].id, model_id, s.tone, s.comment, s.reasoning, now) for s in suggestions
+                )
+
+        conn = self._connection()
+        try:
+            conn.execute("BEGIN")
+            conn.executemany(INSERT_POST_IF_ABSENT, list(submitted_rows.values()))
+            conn.executemany(UPSERT_POST, list(fetched_rows.values()))
+            conn.executemany(INSERT_SUGGESTION, suggestion_rows)
+            conn.execute("COMMIT")
+            logger.debug(
+                f"Stored {len(fetched_rows) + len(submitted_rows)} posts and {len(suggestion_rows)} suggestions"
+            )
+        except Exception as e:
+            conn.execute("ROLLBACK")
+            logger.error(f"Failed to write history batch: {str(e)}")
+
+    def flush(self, timeout: float = 10.0):
+        """Stop the writer after it has applied everything queued so far"""
+        if self._writer is None:
+            return
+        self._queue.put(None)
+        self._writer.join(timeout)
+        self._writer = None
+
+    # Reads
+
+    def history(
+        self,
+        subreddit: Optional[str] = None,
+        limit: int = 20,
+        cursor: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        model_id: Optional[str] = None,
+        query: Optional[str] = None
+    ) -> Tuple[List[PostWithComments], Optional[str]]:
+        """Stored posts newest first, with their suggestions, plus the cursor for the next page"""
+        clauses, params = [], []
+        if subreddit:
+            clauses.append("p.subreddit_key = ?")
+            params.append(subreddit.lower())
+        if since:
+            clauses.append("p.created_utc >= ?")
+            params.append(since.timestamp())
+        if until:
+            clauses.append("p.created_utc < ?")
+            params.append(until.timestamp())
+        if cursor:
+            created_utc, post_id = decode_cursor(cursor)
+            clauses.append("(p.created_utc < ? OR (p.created_utc = ? AND p.id < ?))")
+            params.extend([created_utc, created_utc, post_id])
+        query = query.strip() if query else None
+        if query:
+            match = self._fts_query(query) if self.full_text else None
+            if match:
+                clauses.append("p.rowid IN (SELECT rowid FROM posts_fts WHERE posts_fts MATCH ?)")
+                params.append(match)
+            elif not self.full_text:
+                clauses.append("(p.title LIKE ? OR p.content LIKE ?)")
+                params.extend([f"%{query}%", f"%{query}%"])
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        conn = self._connection()
+        rows = conn.execute(
+            f"SELECT p.* FROM posts p {where} ORDER BY p.created_utc DESC, p.id DESC LIMIT ?",
+            (*params, limit + 1)
+        ).fetchall()
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        suggestions = self._suggestions_for([row["id"] for row in rows], model_id)
+
+        items = [
+            PostWithComments(post=self._row_to_post(row), comment_suggestions=suggestions.get(row["id"], []))
+            for row in rows
+        ]
+        next_cursor = encode_cursor(rows[-1]["created_utc"], rows[-1]["id"]) if has_more else None
+        return items, next_cursor
+
+    def _suggestions_for(self, post_ids: List[str], model_id: Optional[str]):
+        if not post_ids:
+            return {}
+
+        placeholders = ",".join("?" * len(post_ids))
+        sql = f"SELECT post_id, tone, comment, reasoning FROM suggestions WHERE post_id IN ({placeholders})"
+        params = list(post_ids)
+        if model_id:
+            sql += " AND model_id = ?"
+            params.append(model_id)
+        sql += " ORDER BY generated_at DESC, id"
+
+        by_post = {}
+        for row in self._connection().execute(sql, params):
+            by_post.setdefault(row["post_id"], []).append(
+                CommentSuggestion(comment=row["comment"], tone=row["tone"], reasoning=row["reasoning"])
+            )
+        return by_post
+
+    @staticmethod
+    def _fts_query(query: str) -> Optional[str]:
+        # Quote each term so user input cannot use FTS5 query syntax; None when there are no terms
+        terms = [term.replace('"', '""') for term in query.split()]
+        return " ".join(f'"{term}"' for term in terms) or None
+
+    @staticmethod
+    def _row_to_post(row) -> RedditPost:
+        return RedditPost(
+            id=row["id"],
+            title=row["title"],
+            content=row["content"],
+            author=row["author"],
+            subreddit=row["subreddit"],
+            score=row["score"],
+            num_comments=row["num_comments"],
+            created_utc=datetime.fromtimestamp(row["created_utc"]),
+            url=row["url"],
+            permalink=row["permalink"],
+            thumbnail=row["thumbnail"]
+        )
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Ranking Regression Test
+Checks that merging subreddit streams keeps the true top k for the scorer
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from ranking import Candidate, Ranker, rank_streams
+
+def stream(subreddit, scores):
+    return iter([Candidate(subreddit, score, 0, 0.0, f"{subreddit}:{score}") for score in scores])
+
+def comment_stream(subreddit, comments):
+    return iter([Candidate(subreddit, 0, count, 0.0, f"{subreddit}{i}") for i, count in enumerate(comments)])
+
+def test_late_high_score_is_kept():
+    # b's best post comes after two weak ones, unlike its hot order
+    sources = {"a": stream("a", [100, 90, 80]), "b": stream("b", [50, 5, 1000])}
+    top = rank_streams(sources, 2, Ranker("score"))
+    assert [candidate.score for candidate in top] == [1000, 100]
+
+def test_per_source_limit():
+    sources = {"a": stream("a", [100, 90, 80]), "b": stream("b", [50, 5, 1000])}
+    top = rank_streams(sources, 3, Ranker("score"), per_source_limit=2)
+    assert [candidate.score for candidate in top] == [100, 90, 50]
+
+def test_normalize_by_subreddit_maximum():
+    # b's top hot post has no comments; normalizing by it would zero out the whole subreddit
+    sources = {"a": comment_stream("a", [10, 5]), "b": comment_stream("b", [0, 1, 300])}
+    top = rank_streams(sources, 2, Ranker("comment_velocity", normalize=True))
+    assert [candidate.item for candidate in top] == ["a0", "b2"]
+
+def test_normalize_all_zero():
+    sources = {"a": comment_stream("a", [0, 0]), "b": comment_stream("b", [4])}
+    top = rank_streams(sources, 1, Ranker("comment_velocity", normalize=True))
+    assert [candidate.item for candidate in top] == ["b0"]
+
+if __name__ == "__main__":
+    test_late_high_score_is_kept()
+    test_per_source_limit()
+    test_normalize_by_subreddit_maximum()
+    test_normalize_all_zero()
+    print("✅ Ranking tests passed")